@@ -1,93 +1,138 @@
 # ==============================================
 # VISUALIZACIONES FINANCIERAS CON PLOTLY
 # ==============================================
+#
+# El script se organiza en etapas (descarga, carga, limpieza, agregados, una por figura,
+# composición y escritura). Cada etapa se mide con utils.instrumentation: tiempo, variación de RSS,
+# RSS pico de la etapa y del proceso, filas y bytes de salida se añaden como una línea JSON a RUTA_METRICAS.
+
+import logging
+import os
+import webbrowser
 
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
 from scipy.spatial import ConvexHull
-import yfinance as yf
-import pandas as pd
+from utils.aggregates import agregados_al_dia, cargar_agregados, consultar_agregados, reconstruir_agregados
+from utils.build_cache import CacheDisco, GrafoFiguras, huella_funcion
+from utils.composition import componer_grid, escribir_html
+from utils.ingestion import compactar_ohlcv, descargar_yfinance, ingestar
+from utils.instrumentation import Instrumentacion
+from utils.lazy_traces import escribir_velas_lazy
+from utils.presentation import agregar_columnas_presentacion
+from utils.resampling import resample_ohlcv
+from utils.storage import cargar_dataset
+
+logger = logging.getLogger("visualizaciones")
 
 # -------------------------------------------------
-# CARGA DE DATOS
+# CONFIGURACIÓN
 # -------------------------------------------------
 # Lista de empresas (puedes añadir más tickers si lo deseas)
 tickers = ["AAPL", "MSFT", "GOOG"]
+inicio, fin = "2023-01-01", "2025-01-01"
+ruta_almacen = "Data/acciones"
+ruta_agregados = "Data/agregados"
 
-# Descarga de datos (desde 2023 hasta fin de 2024)
-data = yf.download(tickers, start="2023-01-01", end="2025-01-01", group_by="ticker", progress=False)
+# Esquema compacto (Ticker categórico, precios float32, volumen sin signo)
+COMPACTO = False
 
-# Reorganizamos el DataFrame a formato plano
-frames = []
-for ticker in tickers:
-    df_ticker = data[ticker].copy() # type: ignore
-    df_ticker["Ticker"] = ticker
-    df_ticker.reset_index(inplace=True)
-    frames.append(df_ticker)
+# Velas agregadas (diarias, semanales, mensuales...) para no superar BARRAS_VELAS por ticker
+BARRAS_VELAS = 600
 
-# Unimos todos los tickers en un solo DataFrame
-df = pd.concat(frames, ignore_index=True)
+# Modo lazy: cada ticker se escribe en su propio fichero de datos y la página
+# visualizaciones_velas.html solo carga el ticker elegido en el selector.
+# El grid final embebe entonces únicamente el primer ticker.
+VELAS_LAZY = False
 
-# Seleccionamos solo las columnas necesarias
-df = df[["Date", "Ticker", "Open", "High", "Low", "Close", "Volume"]]
-
-# Aseguramos los tipos de datos
-df["Date"] = pd.to_datetime(df["Date"])            # datetime64
-df["Ticker"] = df["Ticker"].astype(str)            # string
-for col in ["Open", "High", "Low", "Close"]:
-    df[col] = df[col].astype(float)                # float64
-df["Volume"] = df["Volume"].astype("int64")        # int64
+colors = {"AAPL": "#1f77b4", "MSFT": "#2ca02c", "GOOG": "#ff7f0e"}
 
-# Verificamos tipos
-print(df.dtypes)
+ruta_html = "visualizaciones_financieras.html"
+titulo_final = "Análisis Financiero de Acciones — Pie Chart, Candlestick y Convex Hull"
 
-# Vista previa
-print(df.head())
+# Instrumentación: métricas por etapa (JSON lines) y perfiles opcionales por etapa
+# (cProfile -> perfiles/<ejecucion>_<etapa>.prof, tracemalloc -> pico y mayores reservas en el log)
+RUTA_METRICAS = "logs/visualizaciones_metricas.jsonl"
+PERFIL_CPU = False
+PERFIL_MEMORIA = False
 
-# Guardar CSV con encabezados correctos
-df.to_csv("acciones_limpio.csv", index=False)
 
 # -------------------------------------------------
-# VISUALIZACIÓN 1: PIE CHART (Distribución Volumen)
+# CARGA DE DATOS
 # -------------------------------------------------
 
-volumen_medio = df.groupby("Ticker")["Volume"].mean().reset_index()
+def descargar(tickers, inicio, fin, fetcher=descargar_yfinance):
+    # Descarga incremental: solo se piden a yfinance (o al fetcher indicado) las fechas que faltan en el almacén
+    return ingestar(tickers, inicio, fin, ruta_almacen, fetcher=fetcher, ruta_agregados=ruta_agregados)
+
+
+def cargar(tickers, inicio, fin):
+    # Carga desde el almacén columnar (los tipos de datos ya vienen conservados)
+    return cargar_dataset(ruta_almacen, tickers=tickers, fecha_inicio=inicio, fecha_fin=fin)
+
+
+def limpiar(df):
+    if COMPACTO:
+        df, informe_precision = compactar_ohlcv(df)
+        logger.info("Informe de precisión:\n%s", informe_precision)
 
-pie_fig = go.Pie(
-    labels=volumen_medio["Ticker"],
-    values=volumen_medio["Volume"],
-    textinfo="label+percent+value",
-    hovertemplate="<b>%{label}</b><br>Volumen medio: %{value:,.0f}<br>%{percent}",
-    textposition="auto",
-    # Comentario: usar hole=0.3 para crear un donut chart más moderno
-    hole=0.3,
-    marker=dict(line=dict(color="#FFFFFF", width=2))
-)
+    # Textos de presentación (Fecha como AAAA-MM-DD) formateados una sola vez para todo el DataFrame;
+    # las figuras los referencian como customdata en lugar de llamar a strftime por ticker
+    df = agregar_columnas_presentacion(df)
 
-pie_layout = go.Layout(
-    title="Distribución del volumen medio por empresa",
-    showlegend=False
-)
+    # Verificamos tipos
+    logger.debug("Tipos:\n%s", df.dtypes)
+    return df
 
-pie_chart = go.Figure(data=[pie_fig], layout=pie_layout)
+
+def agregar(df, tickers, inicio, fin):
+    # Volumen medio a partir del índice de agregados (sumas y conteos parciales por año/mes/día)
+    # Si el almacén cambió sin actualizar el índice (o no hay índice), se reconstruye desde el almacén completo
+    if agregados_al_dia(ruta_agregados, ruta_almacen):
+        agregados = cargar_agregados(ruta_agregados)
+    else:
+        logger.warning("Índice de agregados ausente o desfasado: se reconstruye desde %s", ruta_almacen)
+        agregados = reconstruir_agregados(ruta_almacen, ruta_agregados)
+
+    volumen_medio = consultar_agregados(agregados, "Volume", "mean", fecha_inicio=inicio,
+                                        fecha_fin=pd.Timestamp(fin) - pd.Timedelta(days=1), tickers=tickers)
+    df_velas = resample_ohlcv(df, barras_objetivo=BARRAS_VELAS)
+    return volumen_medio, df_velas
 
 
 # -------------------------------------------------
-# VISUALIZACIÓN 2: CANDLESTICK CHART (Evolución temporal)
+# VISUALIZACIÓN 1: PIE CHART (Distribución Volumen)
 # -------------------------------------------------
 
-# Creamos la figura base con subplots
-fig_candlestick = make_subplots(rows=1, cols=1, subplot_titles=["Evolución temporal de precios"])
+# Las trazas son diccionarios (especificaciones de plotly.js): se serializan con arrays binarios
+# y se colocan en el grid sin construir ni validar objetos go.*
+def trazas_pie(volumen_medio):
+    pie_fig = dict(
+        type="pie",
+        labels=volumen_medio["Ticker"].astype(str).tolist(),
+        values=volumen_medio["Volume"].to_numpy(),
+        textinfo="label+percent+value",
+        hovertemplate="<b>%{label}</b><br>Volumen medio: %{value:,.0f}<br>%{percent}",
+        textposition="auto",
+        # Comentario: usar hole=0.3 para crear un donut chart más moderno
+        hole=0.3,
+        marker=dict(line=dict(color="#FFFFFF", width=2))
+    )
+    return [pie_fig]
+
+
+def figura_pie(grafo, volumen_medio):
+    return grafo.nodo("pie", trazas_pie, volumen_medio)
+
 
-# Tickers únicos
-tickers = df["Ticker"].unique()
+# -------------------------------------------------
+# VISUALIZACIÓN 2: CANDLESTICK CHART (Evolución temporal)
+# -------------------------------------------------
 
-# Agregamos un trace por cada ticker (se muestran alternadamente)
-for ticker in tickers:
-    sub_df = df[df["Ticker"] == ticker]
-    trace = go.Candlestick(
+def trazas_velas(sub_df, ticker, visible):
+    trace = dict(
+        type="candlestick",
         x=sub_df["Date"],
         open=sub_df["Open"],
         high=sub_df["High"],
@@ -96,41 +141,35 @@ for ticker in tickers:
         name=ticker,
         increasing_line_color="#00CC96",  # verde-azul para días alcistas
         decreasing_line_color="#EF553B",  # rojo para días bajistas
-        visible=True if ticker == tickers[0] else False
-    )
-    fig_candlestick.add_trace(trace)
-
-# Selector dropdown para elegir ticker
-buttons = []
-for i, ticker in enumerate(tickers):
-    visible = [False] * len(tickers)
-    visible[i] = True
-    buttons.append(
-        dict(label=ticker,
-             method="update",
-             args=[{"visible": visible},
-                   {"title": f"Evolución de precios OHLC: {ticker}"}])
+        visible=visible
     )
+    return [trace]
+
+
+def figura_velas(grafo, df_velas):
+    # Tickers únicos
+    tickers = df_velas["Ticker"].unique()
+
+    if VELAS_LAZY:
+        escribir_velas_lazy(df_velas, "visualizaciones_velas.html")
+        tickers_embebidos = tickers[:1]
+    else:
+        tickers_embebidos = tickers
+
+    # Un nodo por ticker (se muestran alternadamente)
+    trazas_candlestick = []
+    for ticker in tickers_embebidos:
+        sub_df = df_velas.loc[df_velas["Ticker"] == ticker, ["Date", "Open", "High", "Low", "Close"]]
+        trazas_candlestick += grafo.nodo(f"velas/{ticker}", trazas_velas, sub_df,
+                                         ticker=str(ticker), visible=bool(ticker == tickers[0]))
+    return trazas_candlestick
 
-fig_candlestick.update_layout(
-    updatemenus=[dict(active=0, buttons=buttons, x=0.15, xanchor="left", y=1.1, yanchor="top")],
-    xaxis_title="Fecha",
-    yaxis_title="Precio ($)",
-    xaxis_rangeslider_visible=True,
-    title="Evolución de precios OHLC",
-    template="plotly_white"
-)
 
 # -------------------------------------------------
 # VISUALIZACIÓN 3: CONVEX HULL (Open vs Close)
 # -------------------------------------------------
 
-fig_hull = go.Figure()
-
-colors = {"AAPL": "#1f77b4", "MSFT": "#2ca02c", "GOOG": "#ff7f0e"}
-
-for ticker in tickers:
-    sub_df = df[df["Ticker"] == ticker]
+def trazas_hull(sub_df, ticker, color):
     points = sub_df[["Open", "Close"]].values
 
     # Calcular envolvente convexa
@@ -138,84 +177,157 @@ for ticker in tickers:
     hull_points = points[hull.vertices]
 
     # Scatter de puntos
-    fig_hull.add_trace(go.Scatter(
+    puntos = dict(
+        type="scatter",
         x=sub_df["Open"],
         y=sub_df["Close"],
         mode="markers",
         name=f"{ticker}",
         opacity=0.6,
-        marker=dict(size=6, color=colors[ticker]),
+        marker=dict(size=6, color=color),
         hovertemplate=(
             f"<b>{ticker}</b><br>"
-            "Fecha: %{text}<br>"
+            "Fecha: %{customdata}<br>"
             "Open: %{x:.2f}<br>"
             "Close: %{y:.2f}"
         ),
-        text=sub_df["Date"].dt.strftime("%Y-%m-%d")
-    ))
+        customdata=sub_df["Fecha"].tolist()
+    )
 
     # Línea de la envolvente convexa
-    fig_hull.add_trace(go.Scatter(
+    envolvente = dict(
+        type="scatter",
         x=np.append(hull_points[:, 0], hull_points[0, 0]),
         y=np.append(hull_points[:, 1], hull_points[0, 1]),
         mode="lines",
-        line=dict(color=colors[ticker], width=2),
+        line=dict(color=color, width=2),
         name=f"Convex Hull - {ticker}"
-    ))
-
-# Línea de referencia y=x
-fig_hull.add_trace(go.Scatter(
-    x=[df["Open"].min(), df["Open"].max()],
-    y=[df["Open"].min(), df["Open"].max()],
-    mode="lines",
-    line=dict(color="gray", dash="dash"),
-    name="y = x (Open = Close)"
-))
-
-fig_hull.update_layout(
-    title="🔷 Relación entre precio de apertura y cierre con Envolvente Convexa",
-    xaxis_title="Precio de apertura (Open)",
-    yaxis_title="Precio de cierre (Close)",
-    legend_title="Ticker",
-    template="plotly_white"
-)
+    )
+    return [puntos, envolvente]
+
+
+def trazas_referencia(extremos):
+    # Línea de referencia y=x
+    return [dict(
+        type="scatter",
+        x=extremos,
+        y=extremos,
+        mode="lines",
+        line=dict(color="gray", dash="dash"),
+        name="y = x (Open = Close)"
+    )]
+
+
+def figura_hull(grafo, df):
+    trazas_envolvente = []
+    for ticker in df["Ticker"].unique():
+        sub_df = df.loc[df["Ticker"] == ticker, ["Fecha", "Open", "Close"]]
+        trazas_envolvente += grafo.nodo(f"hull/{ticker}", trazas_hull, sub_df,
+                                        ticker=str(ticker), color=colors.get(ticker))
+
+    trazas_envolvente += grafo.nodo("hull/referencia", trazas_referencia,
+                                    [float(df["Open"].min()), float(df["Open"].max())])
+    return trazas_envolvente
+
 
 # -------------------------------------------------
 # LAYOUT GENERAL EN GRID
 # -------------------------------------------------
 
-from plotly.subplots import make_subplots
-
-# Definir tipos: 'domain' para el pie chart, 'xy' para los otros
-fig_final = make_subplots(
-    rows=2, cols=2,
-    specs=[
-        [{"type": "domain", "colspan": 2}, None],  # Pie chart arriba
-        [{"type": "xy"}, {"type": "xy"}]           # Candlestick y Convex Hull abajo
-    ],
-    subplot_titles=("Distribución Volumen Medio", "Candlestick Chart", "Envolvente Convexa")
-)
-
-# Añadir pie chart (fila 1)
-for trace in pie_chart.data:
-    fig_final.add_trace(trace, row=1, col=1)
-
-# Añadir candlestick (fila 2, col 1)
-for trace in fig_candlestick.data:
-    fig_final.add_trace(trace, row=2, col=1)
-
-# Añadir convex hull (fila 2, col 2)
-for trace in fig_hull.data:
-    fig_final.add_trace(trace, row=2, col=2)
-
-# Ajustes generales
-fig_final.update_layout(
-    height=1000,
-    showlegend=True,
-    template="plotly_white",
-    title_text="Análisis Financiero de Acciones — Pie Chart, Candlestick y Convex Hull",
-)
-
-fig_final.write_html("visualizaciones_financieras.html")
-fig_final.show()
+def componer(trazas_volumen, trazas_candlestick, trazas_envolvente):
+    # El grid se construye directamente con las especificaciones de las trazas (sin add_trace)
+    return componer_grid(
+        paneles=[
+            dict(fila=1, columna=1, trazas=trazas_volumen),                                    # Pie chart arriba
+            dict(fila=2, columna=1, trazas=trazas_candlestick, eje_x=dict(type="date")),       # Candlestick
+            dict(fila=2, columna=2, trazas=trazas_envolvente),                                 # Convex Hull
+        ],
+        layout=dict(
+            height=1000,
+            showlegend=True,
+            template="plotly_white",
+            title_text=titulo_final,
+        ),
+        # Definir tipos: 'domain' para el pie chart, 'xy' para los otros
+        rows=2, cols=2,
+        specs=[
+            [{"type": "domain", "colspan": 2}, None],
+            [{"type": "xy"}, {"type": "xy"}]
+        ],
+        subplot_titles=("Distribución Volumen Medio", "Candlestick Chart", "Envolvente Convexa")
+    )
+
 
+def escribir(fig_final, ruta_html, huella_final):
+    # plotly.js se enlaza como fichero compartido (plotly.min.js) en la carpeta del HTML
+    escribir_html(fig_final, ruta_html)
+    with open(ruta_html + ".huella", "w", encoding="utf-8") as f:
+        f.write(huella_final)
+    return os.path.getsize(ruta_html)
+
+
+def html_al_dia(ruta_html, huella_final):
+    # Si ningún nodo ha cambiado y el HTML existe, no hace falta recomponerlo ni reescribirlo
+    ruta_huella = ruta_html + ".huella"
+    if not (os.path.exists(ruta_html) and os.path.exists(ruta_huella)):
+        return False
+    with open(ruta_huella, encoding="utf-8") as f:
+        return f.read() == huella_final
+
+
+def main(mostrar=True):
+    inst = Instrumentacion(RUTA_METRICAS, perfil_cpu=PERFIL_CPU, perfil_memoria=PERFIL_MEMORIA)
+
+    with inst.etapa("descarga") as registro:
+        registro["filas"] = descargar(tickers, inicio, fin)["filas_nuevas"]
+
+    with inst.etapa("carga") as registro:
+        df = cargar(tickers, inicio, fin)
+        registro["filas"], registro["bytes"] = len(df), int(df.memory_usage(deep=True).sum())
+
+    with inst.etapa("limpieza") as registro:
+        df = limpiar(df)
+        registro["filas"], registro["bytes"] = len(df), int(df.memory_usage(deep=True).sum())
+
+    with inst.etapa("agregados") as registro:
+        volumen_medio, df_velas = agregar(df, tickers, inicio, fin)
+        registro["filas"] = len(df_velas)
+
+    # Construcción incremental: cada figura (y cada ticker) es un nodo cacheado por la huella de sus datos
+    grafo = GrafoFiguras(CacheDisco(".cache/figuras", max_entradas=512))
+    figuras = {}
+    for nombre, construir, datos in [
+        ("pie", figura_pie, volumen_medio),
+        ("velas", figura_velas, df_velas),
+        ("hull", figura_hull, df),
+    ]:
+        with inst.etapa(f"figura/{nombre}") as registro:
+            recalculados_antes = len(grafo.recalculados)
+            figuras[nombre] = construir(grafo, datos)
+            registro["filas"] = len(datos)
+            registro["bytes"] = sum(b for n, b in grafo.bytes_nodos.items() if n.split("/")[0] == nombre)
+            registro["nodos_recalculados"] = grafo.recalculados[recalculados_antes:]
+
+    huella_final = grafo.huella_global(titulo_final, huella_funcion(componer))
+    if html_al_dia(ruta_html, huella_final):
+        logger.info("Ningún nodo ha cambiado: %s está al día", ruta_html)
+        if mostrar:
+            # Se muestra el HTML ya escrito en lugar de recomponer la figura
+            webbrowser.open("file://" + os.path.abspath(ruta_html))
+        return inst.registros
+
+    with inst.etapa("composicion") as registro:
+        fig_final = componer(figuras["pie"], figuras["velas"], figuras["hull"])
+        registro["filas"] = len(fig_final["data"])
+
+    with inst.etapa("escritura") as registro:
+        registro["bytes"] = escribir(fig_final, ruta_html, huella_final)
+
+    if mostrar:
+        pio.show(fig_final, validate=False)
+    return inst.registros
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    main()
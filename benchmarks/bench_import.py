@@ -0,0 +1,100 @@
+# ==============================================
+# BENCHMARK: TIEMPO DE IMPORTACIÓN
+# ==============================================
+# Mide, en intérpretes nuevos, cuánto cuesta importar cada módulo de utils frente a
+# importar solo pandas, y qué dependencias pesadas arrastra cada uno. Es el coste que
+# paga cada proceso de un pool al arrancar.
+#
+# Uso:
+#   python benchmarks/bench_import.py --repeticiones 10
+#   python benchmarks/bench_import.py --modulos utils.tidy_functions --detalle 15
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODULOS = [
+    "pandas",
+    "utils.tidy_functions",
+    "utils.tidy_excel",
+    "utils.xl_bridge",
+    "utils.storage",
+    "utils.ingestion",
+    "utils.build_cache",
+]
+
+# Dependencias cuya presencia en sys.modules se informa tras cada importación
+PESADAS = ["xlwings", "openpyxl", "pyarrow", "plotly", "scipy", "yfinance"]
+
+_SONDA = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+segundos = time.perf_counter() - inicio
+print(json.dumps({{"segundos": segundos, "cargadas": [m for m in {pesadas!r} if m in sys.modules],
+                   "modulos": len(sys.modules)}}))
+"""
+
+
+def medir_importacion(modulo, repeticiones):
+    """
+    Importa el módulo en `repeticiones` intérpretes nuevos.
+
+    :return: Diccionario con la mediana y el mínimo en ms, las dependencias pesadas cargadas y
+        el número de módulos en sys.modules, o con 'error' si la importación falla.
+    """
+    tiempos, ultima = [], None
+    for _ in range(repeticiones):
+        proceso = subprocess.run([sys.executable, "-c", _SONDA.format(modulo=modulo, pesadas=PESADAS)],
+                                 cwd=RAIZ, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            return {"modulo": modulo, "error": proceso.stderr.strip().splitlines()[-1]}
+        ultima = json.loads(proceso.stdout.strip().splitlines()[-1])
+        tiempos.append(ultima["segundos"] * 1000)
+    return {"modulo": modulo, "mediana_ms": round(statistics.median(tiempos), 1), "min_ms": round(min(tiempos), 1),
+            "dependencias_pesadas": ultima["cargadas"], "modulos_cargados": ultima["modulos"]}
+
+
+def detalle_importacion(modulo, n):
+    """Las n importaciones con mayor tiempo acumulado según python -X importtime."""
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+                             cwd=RAIZ, capture_output=True, text=True)
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        # Formato: "import time: <propio us> | <acumulado us> | <módulo>"
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        filas.append((int(acumulado), nombre.strip()))
+    return sorted(filas, reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de importación de utils")
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--detalle", type=int, default=0, help="Muestra las N importaciones más costosas (-X importtime)")
+    parser.add_argument("--salida", default=None, help="Fichero JSON de resultados")
+    args = parser.parse_args()
+
+    resultados = []
+    for modulo in args.modulos:
+        r = medir_importacion(modulo, args.repeticiones)
+        resultados.append(r)
+        if "error" in r:
+            print(f"{modulo:<24} ERROR: {r['error']}")
+        else:
+            print(f"{modulo:<24} {r['mediana_ms']:8.1f} ms (mín {r['min_ms']:.1f})  "
+                  f"{r['modulos_cargados']:5d} módulos  pesadas: {', '.join(r['dependencias_pesadas']) or '-'}")
+        if args.detalle and "error" not in r:
+            for acumulado, nombre in detalle_importacion(modulo, args.detalle):
+                print(f"    {acumulado / 1000:8.1f} ms  {nombre}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
@@ -0,0 +1,306 @@
+# ==============================================
+# BENCHMARK: PIPELINE DE DATOS Y FIGURAS
+# ==============================================
+# Mide tiempo, memoria pico (tracemalloc y RSS) de cada etapa de Visualizaciones.py, llamando a sus
+# propias funciones (descargar -> cargar -> limpiar -> agregar -> figura_* ->
+# componer -> escribir), y de los helpers de utils/tidy_functions.py sobre un
+# universo OHLCV sintético (tickers x años x frecuencia), sin yfinance.
+#
+# Los resultados se guardan en JSON para comparar entre commits.
+#
+# Uso:
+#   python benchmarks/bench_pipeline.py --tickers 10 100 500 --anios 5
+#   python benchmarks/bench_pipeline.py --tickers 50 --frecuencia h --comparar resultados_anteriores.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+import Visualizaciones as V
+from utils.build_cache import GrafoFiguras
+from utils.instrumentation import MuestreoRss, rss_actual_mb
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def universo_sintetico(n_tickers, anios, frecuencia="B", inicio="2015-01-01", semilla=0):
+    """
+    Genera cotizaciones OHLCV tidy con paseos aleatorios (High >= max(Open, Close), Low <= min(Open, Close)).
+
+    :param frecuencia: 'B' para barras diarias o una frecuencia intradía de pandas ('h', '30min'...),
+        en cuyo caso solo se generan barras de lunes a viernes entre las 9:00 y las 16:00.
+    """
+    rng = np.random.default_rng(semilla)
+    fin = pd.Timestamp(inicio) + pd.DateOffset(years=anios)
+    if frecuencia == "B":
+        fechas = pd.bdate_range(inicio, fin, inclusive="left")
+    else:
+        fechas = pd.date_range(inicio, fin, freq=frecuencia, inclusive="left")
+        fechas = fechas[(fechas.dayofweek < 5) & (fechas.hour >= 9) & (fechas.hour < 16)]
+
+    n = len(fechas)
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    cierre = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_tickers, n)), axis=1))
+    apertura = cierre * np.exp(rng.normal(0, 0.005, (n_tickers, n)))
+    rango = np.abs(rng.normal(0, 0.01, (n_tickers, n)))
+    return pd.DataFrame({
+        "Date": np.tile(fechas.to_numpy(), n_tickers),
+        "Ticker": np.repeat(tickers, n),
+        "Open": apertura.ravel(),
+        "High": (np.maximum(apertura, cierre) * (1 + rango)).ravel(),
+        "Low": (np.minimum(apertura, cierre) * (1 - rango)).ravel(),
+        "Close": cierre.ravel(),
+        "Volume": rng.integers(1_000, 10_000_000, n_tickers * n),
+    })
+
+
+def fetcher_sintetico(universo):
+    """Fetcher local para ingestar(): devuelve las filas del universo del rango pedido."""
+    def fetcher(tickers, inicio, fin):
+        mascara = universo["Ticker"].isin(tickers) & (universo["Date"] >= inicio) & (universo["Date"] < fin)
+        return universo[mascara]
+    return fetcher
+
+
+def medir(funcion, repeticiones=1):
+    """
+    Ejecuta funcion() y devuelve (resultado, segundos, pico_mb, rss_pico_mb, rss_delta_mb).
+
+    El tiempo es el mínimo de las repeticiones sin tracemalloc. Durante esas repeticiones se mide
+    la RSS con utils.instrumentation (como en Visualizaciones.py): el pico muestreado de todas
+    ellas y la variación de la primera. La memoria pico de Python se mide en una ejecución aparte
+    con tracemalloc (que ralentiza la ejecución); a diferencia de la RSS, no incluye la memoria
+    reservada fuera de Python, como la de Arrow.
+    """
+    tiempos, rss_pico, rss_delta = [], None, None
+    for _ in range(repeticiones):
+        rss_inicio = rss_actual_mb()
+        with MuestreoRss() as muestreo:
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        rss_fin = rss_actual_mb()
+        if rss_delta is None and None not in (rss_inicio, rss_fin):
+            rss_delta = rss_fin - rss_inicio
+        if muestreo.pico_mb is not None:
+            rss_pico = max(rss_pico or 0.0, muestreo.pico_mb)
+    tracemalloc.start()
+    funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, min(tiempos), pico / 1024 ** 2, rss_pico, rss_delta
+
+
+def _redondear(mb):
+    return round(mb, 1) if mb is not None else None
+
+
+def _filas(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return len(resultado)
+    if isinstance(resultado, dict) and "data" in resultado:
+        return len(resultado["data"])
+    if isinstance(resultado, (list, tuple, dict)):
+        return len(resultado)
+    return None
+
+
+class SinCache:
+    """Caché que nunca acierta: cada medición construye las figuras desde cero."""
+
+    def obtener(self, clave):
+        return None
+
+    def guardar(self, clave, texto):
+        pass
+
+
+def etapas_pipeline(universo, directorio):
+    """
+    Etapas de Visualizaciones.py en orden: lista de (nombre, función sin argumentos).
+
+    Se llaman las funciones del propio script, con el almacén, el índice de agregados y el HTML
+    redirigidos a directorio.
+    """
+    tickers = universo["Ticker"].unique().tolist()
+    inicio, fin = universo["Date"].min(), universo["Date"].max() + pd.Timedelta(days=1)
+    V.ruta_almacen = os.path.join(directorio, "acciones")
+    V.ruta_agregados = os.path.join(directorio, "agregados")
+    ruta_html = os.path.join(directorio, "pipeline.html")
+    estado = {}
+
+    def descarga():
+        shutil.rmtree(V.ruta_almacen, ignore_errors=True)
+        shutil.rmtree(V.ruta_agregados, ignore_errors=True)
+        return V.descargar(tickers, inicio, fin, fetcher=fetcher_sintetico(universo))
+
+    # Cada etapa se ejecuta dos veces (tiempo y memoria): no modifica la salida de la anterior
+    def carga():
+        estado["cargado"] = V.cargar(tickers, inicio, fin)
+        return estado["cargado"]
+
+    def limpieza():
+        estado["df"] = V.limpiar(estado["cargado"])
+        return estado["df"]
+
+    def agregados():
+        estado["volumen_medio"], estado["velas"] = V.agregar(estado["df"], tickers, inicio, fin)
+        return estado["velas"]
+
+    def figura(nombre, construir, datos):
+        def etapa():
+            estado[nombre] = construir(GrafoFiguras(SinCache()), estado[datos])
+            return estado[nombre]
+        return etapa
+
+    def composicion():
+        estado["figura"] = V.componer(estado["pie"], estado["velas_trazas"], estado["hull"])
+        return estado["figura"]
+
+    def escritura():
+        return V.escribir(estado["figura"], ruta_html, "")
+
+    return [
+        ("descarga", descarga), ("carga", carga), ("limpieza", limpieza), ("agregados", agregados),
+        ("figura/pie", figura("pie", V.figura_pie, "volumen_medio")),
+        ("figura/velas", figura("velas_trazas", V.figura_velas, "velas")),
+        ("figura/hull", figura("hull", V.figura_hull, "df")),
+        ("composicion", composicion), ("escritura", escritura),
+    ]
+
+
+def _sin_salida(funcion, *args):
+    # unique_df imprime los valores únicos de cada columna
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcion(*args)
+
+
+def etapas_tidy(universo):
+    """Helpers de utils/tidy_functions.py sobre el universo: lista de (nombre, función sin argumentos)."""
+    import utils.tidy_functions as tf
+
+    df = universo.assign(Year=universo["Date"].dt.year)
+    tickers = pd.DataFrame({"Ticker": universo["Ticker"].unique()})
+    tickers["Sector"] = np.arange(len(tickers)) % 11
+    otra = df.sample(frac=0.5, random_state=0)
+    trozos = [df.iloc[i:i + 500_000] for i in range(0, len(df), 500_000)]
+
+    return [
+        ("describe_df", lambda: tf.describe_df(df)),
+        ("describe_df_chunked", lambda: tf.describe_df_chunked(iter(trozos))),
+        ("resumir_metricas", lambda: tf.resumir_metricas(df, ["Ticker", "Year"], ["Close", "Volume"], ["sum", "mean"])),
+        ("resumir_metricas_paralelo", lambda: tf.resumir_metricas(df, ["Ticker", "Year"], ["Close", "Volume"],
+                                                                  ["sum", "mean"], motor="paralelo")),
+        ("detect_duplicates", lambda: tf.detect_duplicates(df, ["Date", "Ticker"])),
+        ("unique_df", lambda: _sin_salida(tf.unique_df, df[["Ticker", "Year"]])),
+        ("merge_tables", lambda: tf.merge_tables(df, tickers, "Ticker", "Ticker")),
+        ("diff_in_columns", lambda: tf.diff_in_columns(df, "Close", otra, "Close")),
+    ]
+
+
+def ejecutar(n_tickers, anios, frecuencia, repeticiones, incluir_tidy):
+    universo = universo_sintetico(n_tickers, anios, frecuencia)
+    dimensiones = {"tickers": n_tickers, "anios": anios, "frecuencia": frecuencia, "filas_universo": len(universo)}
+    print(f"\nUniverso: {n_tickers} tickers x {anios} años ({frecuencia}) = {len(universo):,} filas")
+
+    grupos = []
+    directorio = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        grupos.append(("pipeline", etapas_pipeline(universo, directorio)))
+        if incluir_tidy:
+            try:
+                grupos.append(("tidy", etapas_tidy(universo)))
+            except ImportError as e:
+                print(f"  tidy_functions no disponible, se omite: {e}")
+
+        resultados = []
+        for grupo, etapas in grupos:
+            for nombre, funcion in etapas:
+                # Las etapas del pipeline dependen de la anterior: una sola repetición
+                resultado, segundos, pico_mb, rss_pico_mb, rss_delta_mb = medir(
+                    funcion, repeticiones if grupo == "tidy" else 1)
+                resultados.append({**dimensiones, "grupo": grupo, "etapa": nombre, "segundos": round(segundos, 6),
+                                   "pico_mb": round(pico_mb, 3), "rss_pico_mb": _redondear(rss_pico_mb),
+                                   "rss_delta_mb": _redondear(rss_delta_mb), "filas": _filas(resultado)})
+                print(f"  {grupo:<8} {nombre:<26} {segundos:9.3f} s  pico {pico_mb:9.1f} MB  "
+                      f"RSS pico {_redondear(rss_pico_mb)} MB  ΔRSS {_redondear(rss_delta_mb)} MB")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return resultados
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultados, ruta_anterior):
+    """Imprime la relación de tiempos (actual / anterior) por etapa y tamaño de universo."""
+    with open(ruta_anterior, encoding="utf-8") as f:
+        anteriores = json.load(f)["resultados"]
+    clave = lambda r: (r["tickers"], r["anios"], r["frecuencia"], r["grupo"], r["etapa"])
+    referencia = {clave(r): r for r in anteriores}
+    print(f"\nComparación con {ruta_anterior} (tiempo actual / anterior):")
+    for r in resultados:
+        anterior = referencia.get(clave(r))
+        if anterior and anterior["segundos"] > 0:
+            relacion = r["segundos"] / anterior["segundos"]
+            aviso = "  <-- regresión" if relacion > 1.2 else ""
+            print(f"  {r['tickers']:>5} tickers  {r['grupo']:<8} {r['etapa']:<26} {relacion:6.2f}x{aviso}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de datos y figuras")
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--anios", type=int, default=5)
+    parser.add_argument("--frecuencia", default="B", help="'B' (diaria) o frecuencia intradía de pandas ('h', '30min')")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones de cada helper de tidy_functions")
+    parser.add_argument("--sin-tidy", action="store_true", help="No medir los helpers de tidy_functions")
+    parser.add_argument("--salida", default=None, help="Fichero JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+
+    resultados = []
+    for n_tickers in args.tickers:
+        resultados += ejecutar(n_tickers, args.anios, args.frecuencia, args.repeticiones, not args.sin_tidy)
+
+    commit = _commit()
+    salida = args.salida or os.path.join(
+        RAIZ, "benchmarks", "resultados", f"pipeline_{commit or 'sin_commit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "numpy": np.__version__,
+                "plataforma": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "resultados": resultados,
+        }, f, indent=2)
+    print(f"\nResultados guardados en {salida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
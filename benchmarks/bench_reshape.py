@@ -0,0 +1,79 @@
+# ==============================================
+# BENCHMARK: APLANADO DE LA DESCARGA DE YFINANCE
+# ==============================================
+# Compara el bucle original (copia + reset_index + concat por ticker) con
+# utils.ingestion.aplanar_descarga (stack vectorizado) en tiempo y memoria pico.
+#
+# Uso:
+#   python benchmarks/bench_reshape.py --tickers 500 --dias 2520
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from utils.ingestion import aplanar_descarga, limpiar_ohlcv
+
+
+def descarga_sintetica(n_tickers, n_dias, semilla=0):
+    """Genera un DataFrame con el mismo formato que yf.download(..., group_by="ticker")."""
+    rng = np.random.default_rng(semilla)
+    fechas = pd.bdate_range("2015-01-01", periods=n_dias, name="Date")
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    columnas = pd.MultiIndex.from_product(
+        [tickers, ["Open", "High", "Low", "Close", "Volume"]], names=["Ticker", "Price"]
+    )
+    valores = 100 + rng.standard_normal((n_dias, len(columnas))).cumsum(axis=0)
+    data = pd.DataFrame(valores, index=fechas, columns=columnas)
+    for ticker in tickers:
+        data[(ticker, "Volume")] = rng.integers(1_000, 1_000_000, n_dias)
+    return data, tickers
+
+
+def aplanar_bucle(data, tickers):
+    """Implementación original basada en un bucle por ticker."""
+    frames = []
+    for ticker in tickers:
+        df_ticker = data[ticker].copy()
+        df_ticker["Ticker"] = ticker
+        df_ticker.reset_index(inplace=True)
+        frames.append(df_ticker)
+    df = pd.concat(frames, ignore_index=True)
+    return limpiar_ohlcv(df)
+
+
+def medir(funcion, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, segundos, pico / 1024 ** 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--dias", type=int, default=252 * 5)
+    args = parser.parse_args()
+
+    data, tickers = descarga_sintetica(args.tickers, args.dias)
+    print(f"Descarga sintética: {args.tickers} tickers x {args.dias} días "
+          f"({data.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB)")
+
+    casos = [
+        ("bucle", lambda: aplanar_bucle(data, tickers)),
+        ("stack float64", lambda: aplanar_descarga(data)),
+        ("stack float32", lambda: aplanar_descarga(data, precision="float32")),
+    ]
+    for nombre, funcion in casos:
+        df, segundos, pico_mb = medir(funcion)
+        print(f"{nombre:<15} {segundos:8.3f} s  pico {pico_mb:9.1f} MB  "
+              f"resultado {df.memory_usage(deep=True).sum() / 1024 ** 2:8.1f} MB  filas {len(df)}")
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def universo(tickers=("AAPL", "MSFT"), inicio="2023-01-01", fin="2024-01-01"):
+    """Cotizaciones OHLCV sintéticas en días laborables, en formato tidy."""
+    fechas = pd.bdate_range(inicio, fin, inclusive="left")
+    n = len(fechas)
+    precios = np.arange(len(tickers) * n, dtype="float64") + 100
+    return pd.DataFrame({
+        "Date": np.tile(fechas.to_numpy(), len(tickers)),
+        "Ticker": np.repeat(list(tickers), n),
+        "Open": precios, "High": precios + 1, "Low": precios - 1, "Close": precios,
+        "Volume": np.arange(len(tickers) * n, dtype="int64"),
+    })
+
+
+class FetcherFalso:
+    """Devuelve las filas del universo del rango pedido, registra las llamadas y falla con 'fallidos'."""
+
+    def __init__(self, datos, fallidos=()):
+        self.datos = datos
+        self.fallidos = set(fallidos)
+        self.llamadas = []
+
+    def __call__(self, tickers, inicio, fin):
+        self.llamadas.append((list(tickers), pd.Timestamp(inicio), pd.Timestamp(fin)))
+        if self.fallidos & set(tickers):
+            raise ConnectionError(f"sin datos para {sorted(self.fallidos & set(tickers))}")
+        mascara = self.datos["Ticker"].isin(tickers) & (self.datos["Date"] >= inicio) & (self.datos["Date"] < fin)
+        return self.datos[mascara]
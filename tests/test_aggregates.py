@@ -0,0 +1,40 @@
+import numpy as np
+
+from conftest import universo
+from utils.aggregates import agregados_al_dia, cargar_agregados, consultar_agregados
+from utils.ingestion import anexar_dataset
+from utils.storage import cargar_dataset, guardar_dataset
+
+
+def media_volumen(df, inicio, fin):
+    rango = df[(df["Date"] >= inicio) & (df["Date"] <= fin)]
+    return rango.groupby("Ticker")["Volume"].mean()
+
+
+def test_indice_nuevo_sobre_almacen_existente_cubre_todo_el_almacen(tmp_path):
+    ruta_almacen, ruta_agregados = str(tmp_path / "acciones"), str(tmp_path / "agregados")
+    guardar_dataset(universo(inicio="2023-01-01", fin="2024-01-01"), ruta_almacen)
+
+    # Primera ingesta con índice cuando el almacén ya tenía 2023
+    anexar_dataset(universo(inicio="2024-01-01", fin="2025-01-01"), ruta_almacen, ruta_agregados=ruta_agregados)
+
+    resultado = consultar_agregados(cargar_agregados(ruta_agregados), "Volume", "mean", "2023-01-01", "2024-12-31")
+    esperado = media_volumen(cargar_dataset(ruta_almacen), "2023-01-01", "2024-12-31")
+    np.testing.assert_allclose(resultado.set_index("Ticker")["Volume"], esperado.loc[resultado["Ticker"]])
+    assert agregados_al_dia(ruta_agregados, ruta_almacen)
+
+
+def test_almacen_modificado_sin_indice_lo_deja_desfasado(tmp_path):
+    ruta_almacen, ruta_agregados = str(tmp_path / "acciones"), str(tmp_path / "agregados")
+    anexar_dataset(universo(inicio="2023-01-01", fin="2024-01-01"), ruta_almacen, ruta_agregados=ruta_agregados)
+    assert agregados_al_dia(ruta_agregados, ruta_almacen)
+
+    anexar_dataset(universo(inicio="2024-01-01", fin="2024-03-01"), ruta_almacen)
+    assert not agregados_al_dia(ruta_agregados, ruta_almacen)
+
+    # La siguiente actualización detecta el desfase en particiones no afectadas y reconstruye el índice
+    anexar_dataset(universo(("AAPL",), "2024-03-01", "2024-04-01"), ruta_almacen,
+                   ruta_agregados=ruta_agregados)
+    assert agregados_al_dia(ruta_agregados, ruta_almacen)
+    resultado = consultar_agregados(cargar_agregados(ruta_agregados), "Volume", "count", tickers=["MSFT"])
+    assert resultado["Volume"].item() == (cargar_dataset(ruta_almacen, tickers=["MSFT"])).shape[0]
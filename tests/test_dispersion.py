@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import utils.dispersion as dispersion
+from utils.hull import area_envolvente, envolvente_convexa
+
+
+def test_area_y_desviacion_coinciden_con_el_calculo_por_ventana(monkeypatch):
+    # Bloques pequeños para recorrer varias ventanas y tickers por bloque
+    monkeypatch.setattr(dispersion, "ELEMENTOS_POR_BLOQUE", 200)
+    rng = np.random.default_rng(0)
+    fechas = pd.bdate_range("2024-01-01", periods=40)
+    df = pd.DataFrame({
+        "Date": np.tile(fechas, 3),
+        "Ticker": np.repeat(["AAPL", "GOOG", "MSFT"], len(fechas)),
+        "Open": np.round(rng.normal(100, 2, 3 * len(fechas)), 1),
+        "Close": np.round(rng.normal(100, 2, 3 * len(fechas)), 1),
+    })
+    df = df.drop(index=[5, 50])     # sesiones que faltan en un ticker
+
+    metricas = dispersion.metricas_dispersion(df, ventanas=(10,)).set_index(["Ticker", "Date"])
+
+    for ticker, grupo in df.groupby("Ticker"):
+        grupo = grupo.sort_values("Date")
+        for i in range(10, len(grupo) + 1):
+            ventana = grupo.iloc[i - 10:i]
+            fila = metricas.loc[(ticker, ventana["Date"].iloc[-1])]
+            puntos = ventana[["Open", "Close"]].to_numpy()
+            assert np.isclose(fila["Area"], area_envolvente(envolvente_convexa(puntos)))
+            desviacion = (ventana["Close"] - ventana["Open"]) / np.sqrt(2)
+            assert np.isclose(fila["Desv_Std"], desviacion.std(ddof=0))
+            assert np.isclose(fila["Desv_P95"], np.percentile(desviacion, 95))
+    assert len(metricas) == sum(len(g) - 9 for _, g in df.groupby("Ticker"))
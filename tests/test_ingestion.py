@@ -0,0 +1,95 @@
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+from conftest import FetcherFalso, universo
+from utils.ingestion import anexar_dataset, descargar_yfinance, ingestar
+from utils.storage import cargar_dataset
+
+
+@pytest.fixture
+def ruta(tmp_path):
+    return str(tmp_path / "acciones")
+
+
+def test_segunda_ingesta_no_anade_filas(ruta):
+    fetcher = FetcherFalso(universo(["AAPL", "MSFT"]))
+    primera = ingestar(["AAPL", "MSFT"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+    segunda = ingestar(["AAPL", "MSFT"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+
+    assert primera["filas_nuevas"] == len(fetcher.datos)
+    assert segunda["filas_nuevas"] == 0
+    assert len(cargar_dataset(ruta)) == len(fetcher.datos)
+
+
+def test_rango_sin_sesiones_no_se_vuelve_a_pedir(ruta):
+    # 2023-01-01 es domingo y 2023-01-02 no tiene filas: el primer día guardado es el 3
+    datos = universo(["AAPL", "MSFT"])
+    fetcher = FetcherFalso(datos[datos["Date"] >= "2023-01-03"])
+    ingestar(["AAPL", "MSFT"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+    fetcher.llamadas.clear()
+
+    resumen = ingestar(["AAPL", "MSFT"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+
+    assert fetcher.llamadas == []
+    assert resumen["filas_nuevas"] == 0
+
+
+def test_anexar_cuenta_solo_claves_nuevas(ruta):
+    datos = universo(["AAPL", "MSFT"])
+    assert anexar_dataset(datos[datos["Date"] < "2023-07-01"], ruta) == int((datos["Date"] < "2023-07-01").sum())
+    # Se solapan las filas de junio: solo cuentan las de julio en adelante
+    assert anexar_dataset(datos[datos["Date"] >= "2023-06-01"], ruta) == int((datos["Date"] >= "2023-07-01").sum())
+    assert anexar_dataset(datos, ruta) == 0
+
+
+def test_ventana_mas_larga_solo_anade_filas_nuevas(ruta):
+    fetcher = FetcherFalso(universo(["AAPL", "MSFT"]))
+    ingestar(["AAPL", "MSFT"], "2023-01-01", "2023-07-01", ruta, fetcher=fetcher, reintentos=0)
+    guardadas = cargar_dataset(ruta)["Date"]
+    fetcher.llamadas.clear()
+
+    resumen = ingestar(["AAPL", "MSFT"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+
+    assert resumen["filas_nuevas"] == int((fetcher.datos["Date"] >= "2023-07-01").sum())
+    # Solo se piden fechas fuera del rango ya guardado
+    assert all(fin <= guardadas.min() or inicio > guardadas.max() for _, inicio, fin in fetcher.llamadas)
+    df = cargar_dataset(ruta)
+    assert len(df) == len(fetcher.datos)
+    assert not df.duplicated(["Date", "Ticker"]).any()
+
+
+def test_ticker_fallido_no_detiene_al_resto(ruta):
+    fetcher = FetcherFalso(universo(["AAPL", "MSFT", "ROTO"]), fallidos=["ROTO"])
+    resumen = ingestar(["AAPL", "MSFT", "ROTO"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+
+    assert list(resumen["fallidos"]) == ["ROTO"]
+    assert sorted(cargar_dataset(ruta)["Ticker"].unique()) == ["AAPL", "MSFT"]
+    assert resumen["filas_nuevas"] == int((fetcher.datos["Ticker"] != "ROTO").sum())
+
+    # El ticker fallido no queda cubierto y se vuelve a pedir
+    fetcher.llamadas.clear()
+    ingestar(["AAPL", "MSFT", "ROTO"], "2023-01-01", "2024-01-01", ruta, fetcher=fetcher, reintentos=0)
+    assert [tickers for tickers, _, _ in fetcher.llamadas] == [["ROTO"]]
+
+
+def test_yfinance_sin_datos_para_un_ticker_se_informa(ruta, monkeypatch):
+    datos = universo(["AAPL", "MSFT"])
+
+    def download(tickers, start, end, group_by, progress):
+        # Como yfinance: el símbolo que falla aparece con todas sus columnas vacías
+        ancho = datos.set_index(["Date", "Ticker"]).unstack("Ticker")
+        ancho = ancho.swaplevel(axis=1).reindex(columns=pd.MultiIndex.from_product(
+            [tickers, ["Open", "High", "Low", "Close", "Volume"]]))
+        return ancho[(ancho.index >= start) & (ancho.index < end)]
+
+    monkeypatch.setitem(sys.modules, "yfinance", types.SimpleNamespace(download=download))
+    with pytest.raises(ConnectionError, match="ROTO"):
+        descargar_yfinance(["AAPL", "ROTO"], "2023-01-01", "2023-02-01")
+
+    resumen = ingestar(["AAPL", "MSFT", "ROTO"], "2023-01-01", "2023-02-01", ruta,
+                       fetcher=descargar_yfinance, reintentos=0)
+    assert list(resumen["fallidos"]) == ["ROTO"]
+    assert sorted(cargar_dataset(ruta)["Ticker"].unique()) == ["AAPL", "MSFT"]
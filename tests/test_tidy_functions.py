@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+
+from utils.tidy_functions import construir_indice_clave, diff_in_columns_aproximado, merge_tables
+
+
+@pytest.fixture
+def tablas():
+    hechos = pd.DataFrame({
+        "Ticker": ["AAPL", "MSFT", "GOOG", "AAPL", "TSLA"],
+        "Close": [1.0, 2.0, 3.0, 4.0, 5.0],
+    })
+    referencia = pd.DataFrame({
+        "Ticker": ["AAPL", "GOOG", "MSFT"],
+        "Sector": pd.Categorical(["Tecnología", "Comunicación", "Tecnología"]),
+        "Empleados": [164_000, 182_000, 221_000],
+    })
+    return hechos, referencia
+
+
+@pytest.mark.parametrize("how", ["inner", "left"])
+def test_merge_con_indice_igual_que_pd_merge(tablas, how):
+    hechos, referencia = tablas
+    indice = construir_indice_clave(referencia, "Ticker")
+
+    resultado = merge_tables(hechos, referencia, "Ticker", "Ticker", how=how, indice_table2=indice)
+    esperado = pd.merge(hechos, referencia, on="Ticker", how=how)
+
+    assert isinstance(resultado["Sector"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(resultado, esperado)
+
+
+
+def test_diff_aproximado_con_chunks_de_distinto_tipo():
+    # read_csv lee como float los chunks con algún NaN: 1 y 1.0 deben considerarse el mismo valor
+    enteros = [pd.DataFrame({"id": [1, 2, 3]})]
+    decimales = [pd.DataFrame({"id": [1.0, 2.0, float("nan")]})]
+    nullable = [pd.DataFrame({"id": pd.array([2, None], dtype="Int64")})]
+
+    assert diff_in_columns_aproximado(enteros, "id", decimales, "id") == {3}
+    assert diff_in_columns_aproximado(enteros, "id", decimales, "id", encontrar_no_en_col2=False) == {1, 2}
+    assert diff_in_columns_aproximado(enteros, "id", nullable, "id") == {1, 3}
+
+
+def test_load_excel_sheets_con_cache_no_abre_el_libro(tmp_path, monkeypatch):
+    from utils.tidy_excel import load_excel_sheets
+
+    aperturas = []
+
+    class LibroFalso:
+        sheet_names = ["Precios", "Volumen"]
+
+        def __init__(self, path):
+            aperturas.append(path)
+
+        def parse(self, hoja, usecols=None):
+            return pd.DataFrame({"Hoja": [hoja], "Valor": [len(aperturas)]})
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(pd, "ExcelFile", LibroFalso)
+    libro, cache = tmp_path / "libro.xlsx", tmp_path / "cache"
+    libro.write_bytes(b"v1")
+
+    primera = load_excel_sheets(str(libro), cache_dir=str(cache))
+    segunda = load_excel_sheets(str(libro), sheet_name="Volumen", cache_dir=str(cache))
+    assert len(aperturas) == 1
+    pd.testing.assert_frame_equal(segunda, primera["Volumen"])
+
+    # Un libro modificado invalida la caché y sus entradas anteriores se eliminan
+    libro.write_bytes(b"version 2")
+    load_excel_sheets(str(libro), sheet_name="Precios", cache_dir=str(cache))
+    assert len(aperturas) == 2
+    (carpeta,) = cache.iterdir()
+    assert len(list(carpeta.iterdir())) == 2     # lista de hojas + hoja Precios
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from utils.xl_bridge import HojaMemoria, leer_rango, xlexport, xlimport
+
+
+def test_ida_y_vuelta_por_bloques():
+    df = pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=7),
+        "Ticker": ["AAPL", "MSFT", "GOOG", "AAPL", "MSFT", "GOOG", "AAPL"],
+        "Codigo": ["00123", "00456", "00789", "00123", "00456", "00789", "00123"],
+        "Close": [1.5, 2.5, np.nan, 4.5, 5.5, 6.5, 7.5],
+        "Volume": [10, 20, 30, 40, 50, 60, 70],
+    })
+    hoja = HojaMemoria()
+    xlexport(df, tam_bloque=3, hoja=hoja)
+    leido = xlimport(tam_bloque=3, hoja=hoja, tipos={"Volume": "int64"})
+
+    # Cabecera + 3 bloques al escribir y al leer
+    assert hoja.llamadas == 8
+    assert leido["Codigo"].tolist() == df["Codigo"].tolist()
+    assert leido["Volume"].dtype == "int64"
+    pd.testing.assert_frame_equal(leido, df, check_dtype=False)
+    assert pd.api.types.is_datetime64_any_dtype(leido["Date"])
+
+
+def test_cabecera_con_nombres_repetidos_y_vacios():
+    hoja = HojaMemoria([
+        ["Ticker", "Close", "Close", None],
+        ["AAPL", 1.0, 2.0, "x"],
+        ["MSFT", 3.0, 4.0, None],
+    ])
+    leido = leer_rango(hoja, tipos={"Close": "float32"})
+
+    assert list(leido.columns[:3]) == ["Ticker", "Close", "Close"]
+    assert pd.isna(leido.columns[3])
+    assert leido.iloc[:, 1].tolist() == [1.0, 3.0]
+    assert leido.iloc[:, 2].tolist() == [2.0, 4.0]
+    assert (leido.dtypes.iloc[1:3] == "float32").all()
+    assert leido.iloc[:, 3].tolist()[0] == "x"
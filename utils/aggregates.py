@@ -0,0 +1,264 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.storage import cargar_dataset, marcas_particiones
+########################################
+
+# Niveles del índice de agregados y frecuencia de pandas de cada bucket
+NIVELES = {"dia": "D", "mes": "MS", "anio": "YS"}
+
+# Columnas agregadas por defecto
+COLUMNAS_AGREGADAS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Parciales que se guardan por columna (todos combinables entre buckets)
+PARCIALES = ["sum", "count", "min", "max"]
+
+# Fichero del índice con las marcas de agua del almacén del que se construyó
+FICHERO_MARCAS = "marcas.parquet"
+
+
+def construir_agregados(df, columnas=None):
+    """
+    Construye el índice de agregados parciales por ticker y día, mes y año.
+
+    Cada bucket guarda, por columna, la suma, el número de valores, el mínimo y el máximo, de modo
+    que cualquier media, suma, conteo, mínimo o máximo sobre un rango de fechas se obtiene
+    combinando unos pocos buckets en lugar de recorrer todas las filas.
+
+    :param df: DataFrame tidy con Date, Ticker y las columnas a agregar.
+    :param columnas: Columnas a agregar. Por defecto Open, High, Low, Close y Volume.
+    :return: Diccionario {nivel: DataFrame} con las columnas Ticker, Inicio, Fin y '<columna>_<parcial>'.
+    """
+    columnas = list(columnas) if columnas is not None else [c for c in COLUMNAS_AGREGADAS if c in df.columns]
+    datos = df[["Date", "Ticker"] + columnas].assign(Ticker=df["Ticker"].astype(str))
+
+    agregados = {}
+    for nivel, frecuencia in NIVELES.items():
+        if nivel == "dia":
+            inicio = datos["Date"].dt.normalize()
+        else:
+            inicio = datos["Date"].dt.to_period(frecuencia[0]).dt.start_time
+        tabla = datos.groupby(["Ticker", inicio.rename("Inicio")])[columnas].agg(PARCIALES)
+        tabla.columns = ["_".join(col) for col in tabla.columns]
+        tabla = tabla.reset_index()
+        tabla["Fin"] = _fin_bucket(tabla["Inicio"], nivel)
+        agregados[nivel] = _ordenar(tabla)
+    return agregados
+
+
+def _fin_bucket(inicio, nivel):
+    """Último día incluido en cada bucket."""
+    if nivel == "dia":
+        return inicio
+    return inicio.dt.to_period(NIVELES[nivel][0]).dt.end_time.dt.normalize()
+
+
+def _ordenar(tabla):
+    # Ordenado por Inicio para poder localizar rangos con búsqueda binaria
+    return tabla.sort_values(["Inicio", "Ticker"], kind="stable").reset_index(drop=True)
+
+
+def guardar_agregados(agregados, ruta, marcas=None):
+    """
+    Guarda el índice de agregados en una carpeta (un fichero Parquet por nivel).
+
+    :param agregados: Diccionario devuelto por construir_agregados().
+    :param ruta: Carpeta de destino.
+    :param marcas: Marcas de agua del almacén de origen (ver utils.storage.marcas_particiones),
+        usadas por agregados_al_dia() para detectar un índice desfasado.
+    """
+    os.makedirs(ruta, exist_ok=True)
+    for nivel, tabla in agregados.items():
+        tabla.to_parquet(os.path.join(ruta, f"{nivel}.parquet"), index=False)
+    if marcas is not None:
+        marcas.to_parquet(os.path.join(ruta, FICHERO_MARCAS), index=False)
+
+
+def cargar_agregados(ruta):
+    """
+    Carga el índice de agregados guardado con guardar_agregados().
+
+    :param ruta: Carpeta del índice.
+    :return: Diccionario {nivel: DataFrame}.
+    """
+    if not os.path.isdir(ruta):
+        raise FileNotFoundError(f"No existe el índice de agregados: {ruta}")
+    return {nivel: pd.read_parquet(os.path.join(ruta, f"{nivel}.parquet")) for nivel in NIVELES}
+
+
+def _normalizar_marcas(marcas):
+    return pd.DataFrame({
+        "Ticker": marcas["Ticker"].astype(str).to_numpy(),
+        "Year": marcas["Year"].to_numpy(dtype="int64"),
+        "Max": marcas["Max"].to_numpy(dtype="datetime64[ns]"),
+        "Filas": marcas["Filas"].to_numpy(dtype="int64"),
+    }).sort_values(["Ticker", "Year"]).reset_index(drop=True)
+
+
+def _marcas_guardadas(ruta):
+    ruta_marcas = os.path.join(ruta, FICHERO_MARCAS)
+    if not os.path.exists(ruta_marcas):
+        return None
+    return _normalizar_marcas(pd.read_parquet(ruta_marcas))
+
+
+def agregados_al_dia(ruta, ruta_almacen):
+    """
+    Indica si el índice de agregados refleja el contenido actual del almacén.
+
+    Compara las marcas de agua (última fecha y filas por partición) guardadas con el índice con
+    las del almacén. Un índice sin marcas se considera desfasado.
+
+    :param ruta: Carpeta del índice.
+    :param ruta_almacen: Directorio raíz del almacén.
+    :return: True si el índice existe y está al día.
+    """
+    if not os.path.isdir(ruta):
+        return False
+    guardadas = _marcas_guardadas(ruta)
+    return guardadas is not None and guardadas.equals(_normalizar_marcas(marcas_particiones(ruta_almacen)))
+
+
+def reconstruir_agregados(ruta_almacen, ruta):
+    """
+    Construye el índice de agregados a partir del almacén completo y lo guarda con sus marcas de agua.
+
+    :param ruta_almacen: Directorio raíz del almacén.
+    :param ruta: Carpeta del índice.
+    :return: Diccionario {nivel: DataFrame}.
+    """
+    agregados = construir_agregados(cargar_dataset(ruta_almacen))
+    guardar_agregados(agregados, ruta, marcas=marcas_particiones(ruta_almacen))
+    return agregados
+
+
+def actualizar_agregados(df_particiones, ruta, ruta_almacen):
+    """
+    Mantiene el índice de agregados al día durante la ingesta.
+
+    Recibe todas las filas de las particiones (Ticker, año) reescritas y sustituye sus buckets,
+    por lo que la actualización es idempotente aunque se repita la misma ingesta. Si el índice no
+    existe, o el resto de particiones no coincide con sus marcas de agua (el almacén se modificó
+    sin actualizar el índice), se reconstruye a partir del almacén completo.
+
+    :param df_particiones: Filas completas de las particiones (Ticker, año) afectadas, ya guardadas.
+    :param ruta: Carpeta del índice.
+    :param ruta_almacen: Directorio raíz del almacén.
+    """
+    guardadas = _marcas_guardadas(ruta) if os.path.isdir(ruta) else None
+    if guardadas is None:
+        reconstruir_agregados(ruta_almacen, ruta)
+        return
+
+    marcas = _normalizar_marcas(marcas_particiones(ruta_almacen))
+    afectadas = pd.MultiIndex.from_arrays(
+        [df_particiones["Ticker"].astype(str), df_particiones["Date"].dt.year]
+    ).unique()
+
+    def sin_afectadas(tabla):
+        claves = pd.MultiIndex.from_arrays([tabla["Ticker"], tabla["Year"]])
+        return tabla[~claves.isin(afectadas)].reset_index(drop=True)
+
+    if not sin_afectadas(guardadas).equals(sin_afectadas(marcas)):
+        reconstruir_agregados(ruta_almacen, ruta)
+        return
+
+    nuevos = construir_agregados(df_particiones)
+    existentes = cargar_agregados(ruta)
+    for nivel, tabla in existentes.items():
+        claves = pd.MultiIndex.from_arrays([tabla["Ticker"], tabla["Inicio"].dt.year])
+        combinada = pd.concat([tabla[~claves.isin(afectadas)], nuevos[nivel]], ignore_index=True)
+        existentes[nivel] = _ordenar(combinada)
+    guardar_agregados(existentes, ruta, marcas=marcas)
+
+
+def _descomponer(inicio, fin):
+    """
+    Descompone el rango [inicio, fin] en intervalos de años completos, meses completos y días sueltos.
+
+    :return: Lista de tuplas (nivel, primer inicio de bucket, último inicio de bucket).
+    """
+    intervalos = []
+
+    def meses_y_dias(desde, hasta):
+        if desde > hasta:
+            return
+        primer_mes = desde if desde.day == 1 else desde + pd.offsets.MonthBegin(1)
+        ultimo_mes = hasta.replace(day=1) if hasta.is_month_end else hasta.replace(day=1) - pd.offsets.MonthBegin(1)
+        if primer_mes > ultimo_mes:
+            intervalos.append(("dia", desde, hasta))
+            return
+        intervalos.append(("mes", primer_mes, ultimo_mes))
+        if desde < primer_mes:
+            intervalos.append(("dia", desde, primer_mes - pd.Timedelta(days=1)))
+        fin_meses = ultimo_mes + pd.offsets.MonthEnd(1)
+        if fin_meses < hasta:
+            intervalos.append(("dia", fin_meses + pd.Timedelta(days=1), hasta))
+
+    primer_anio = inicio.year if (inicio.month, inicio.day) == (1, 1) else inicio.year + 1
+    ultimo_anio = fin.year if (fin.month, fin.day) == (12, 31) else fin.year - 1
+    if primer_anio > ultimo_anio:
+        meses_y_dias(inicio, fin)
+        return intervalos
+
+    intervalos.append(("anio", pd.Timestamp(primer_anio, 1, 1), pd.Timestamp(ultimo_anio, 1, 1)))
+    meses_y_dias(inicio, pd.Timestamp(primer_anio, 1, 1) - pd.Timedelta(days=1))
+    meses_y_dias(pd.Timestamp(ultimo_anio + 1, 1, 1), fin)
+    return intervalos
+
+
+def consultar_agregados(agregados, columna, metrica="mean", fecha_inicio=None, fecha_fin=None, tickers=None):
+    """
+    Calcula una métrica por ticker sobre un rango de fechas a partir de los agregados parciales.
+
+    El coste depende del número de buckets combinados (años completos, meses completos y los días
+    sueltos de los extremos), no del número de filas del histórico.
+
+    Parámetros:
+        agregados (dict): Índice devuelto por construir_agregados() o cargar_agregados().
+        columna (str): Columna agregada (por ejemplo 'Volume').
+        metrica (str, opcional): 'mean', 'sum', 'count', 'min' o 'max'. Por defecto 'mean'.
+        fecha_inicio (str o Timestamp, opcional): Primera fecha incluida. Por defecto, todo el histórico.
+        fecha_fin (str o Timestamp, opcional): Última fecha incluida. Por defecto, todo el histórico.
+        tickers (list, opcional): Tickers a devolver. Por defecto todos.
+
+    Retorna:
+        pd.DataFrame: Columnas Ticker y <columna> con la métrica solicitada.
+
+    Ejemplo de uso:
+        volumen_medio = consultar_agregados(agregados, 'Volume', 'mean', '2024-01-15', '2024-06-30')
+    """
+    if metrica not in ("mean", "sum", "count", "min", "max"):
+        raise ValueError(f"Métrica '{metrica}' no soportada. Opciones: ['mean', 'sum', 'count', 'min', 'max']")
+    if f"{columna}_sum" not in agregados["dia"].columns:
+        raise KeyError(f"La columna '{columna}' no está en el índice de agregados.")
+
+    anios = agregados["anio"]
+    inicio = pd.Timestamp(fecha_inicio).normalize() if fecha_inicio is not None else anios["Inicio"].min()
+    fin = pd.Timestamp(fecha_fin).normalize() if fecha_fin is not None else anios["Fin"].max()
+
+    partes = []
+    for nivel, desde, hasta in _descomponer(inicio, fin):
+        tabla = agregados[nivel]
+        inicios = tabla["Inicio"].to_numpy()
+        i = np.searchsorted(inicios, np.datetime64(desde), side="left")
+        j = np.searchsorted(inicios, np.datetime64(hasta), side="right")
+        partes.append(tabla.iloc[i:j])
+
+    columnas = [f"{columna}_{parcial}" for parcial in PARCIALES]
+    buckets = pd.concat(partes, ignore_index=True)[["Ticker"] + columnas]
+    if tickers is not None:
+        buckets = buckets[buckets["Ticker"].isin([str(t) for t in tickers])]
+
+    combinados = buckets.groupby("Ticker").agg({
+        f"{columna}_sum": "sum", f"{columna}_count": "sum", f"{columna}_min": "min", f"{columna}_max": "max",
+    })
+    if metrica == "mean":
+        resultado = combinados[f"{columna}_sum"] / combinados[f"{columna}_count"]
+    else:
+        resultado = combinados[f"{columna}_{metrica}"]
+    return resultado.rename(columna).reset_index()
@@ -0,0 +1,164 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import functools
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import plotly
+from plotly.io.json import to_json_plotly
+
+from utils.composition import array_binario
+########################################
+
+# Versión del formato de los nodos: cambiarla invalida toda la caché
+VERSION_CACHE = 2
+
+
+def huella(*partes):
+    """
+    Hash de contenido (SHA-1) de DataFrames, Series, arrays y parámetros simples.
+
+    Los DataFrames se resumen con el hash de 64 bits de cada fila, sus columnas y sus tipos, de
+    modo que dos porciones con los mismos datos dan la misma huella aunque tengan otro índice.
+    """
+    h = hashlib.sha1(str(VERSION_CACHE).encode())
+    for parte in partes:
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            if isinstance(parte, pd.DataFrame):
+                h.update(repr([(str(c), str(t)) for c, t in parte.dtypes.items()]).encode())
+            else:
+                h.update(repr((str(parte.name), str(parte.dtype))).encode())
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        elif isinstance(parte, np.ndarray):
+            h.update(str(parte.dtype).encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+        else:
+            h.update(json.dumps(parte, sort_keys=True, default=str).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def huella_funcion(funcion):
+    """
+    Huella del código de una función que construye trazas: su código fuente (o su bytecode si no
+    hay fuente disponible), la versión de su módulo si la declara y la versión de plotly.
+
+    Cambiar la función invalida sus nodos sin tener que subir VERSION_CACHE. Las funciones a
+    las que llama no forman parte de la huella.
+    """
+    try:
+        codigo = inspect.getsource(funcion)
+    except (OSError, TypeError):
+        codigo = funcion.__code__.co_code.hex() + repr(funcion.__code__.co_consts)
+    version_modulo = getattr(inspect.getmodule(funcion), "__version__", None)
+    return huella(funcion.__module__, funcion.__qualname__, codigo, version_modulo, plotly.__version__)
+
+
+class CacheDisco:
+    """
+    Caché en disco de textos (un fichero por clave) con desalojo LRU.
+
+    La fecha de modificación de cada fichero hace de marca de último uso: se actualiza en cada
+    acierto y, al superar max_entradas, se borran los ficheros usados hace más tiempo.
+    """
+
+    def __init__(self, directorio, max_entradas=512):
+        self.directorio = directorio
+        self.max_entradas = max_entradas
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def obtener(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                texto = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(ruta)
+        return texto
+
+    def guardar(self, clave, texto):
+        ruta = self._ruta(clave)
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporal, ruta)
+        self._desalojar()
+
+    def _desalojar(self):
+        entradas = [e for e in os.scandir(self.directorio) if e.name.endswith(".json")]
+        sobrantes = len(entradas) - self.max_entradas
+        if sobrantes > 0:
+            entradas.sort(key=lambda e: e.stat().st_mtime_ns)
+            for entrada in entradas[:sobrantes]:
+                os.remove(entrada.path)
+
+
+def _codificar_arrays(objeto):
+    if isinstance(objeto, dict):
+        return {clave: _codificar_arrays(valor) for clave, valor in objeto.items()}
+    if isinstance(objeto, (list, tuple)):
+        return [_codificar_arrays(valor) for valor in objeto]
+    if isinstance(objeto, (np.ndarray, pd.Series, pd.Index)):
+        return array_binario(objeto)
+    return objeto
+
+
+def serializar_trazas(trazas):
+    """
+    Serializa una lista de trazas (diccionarios u objetos de plotly) a JSON.
+
+    Los arrays de NumPy y pandas se codifican como typed arrays en base64 (array_binario).
+    """
+    trazas = [t.to_plotly_json() if hasattr(t, "to_plotly_json") else t for t in trazas]
+    return to_json_plotly(_codificar_arrays(trazas))
+
+
+class GrafoFiguras:
+    """
+    Construcción incremental de figuras: cada nodo es una lista de trazas identificada por la
+    huella de sus datos de entrada, sus parámetros y el código de la función que las construye.
+
+    Los nodos cuya huella ya está en la caché se leen ya serializados; solo los nodos sucios
+    (datos o parámetros nuevos) se recalculan. Con un nodo por ticker, una barra nueva en un
+    ticker solo recalcula las trazas de ese ticker.
+
+    Ejemplo de uso:
+        grafo = GrafoFiguras(CacheDisco('.cache/figuras'))
+        trazas = grafo.nodo('velas', trazas_velas, sub_df, ticker='AAPL')
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.claves = {}
+        self.bytes_nodos = {}
+        self.recalculados = []
+
+    def nodo(self, nombre, funcion, datos, **parametros):
+        """
+        Devuelve las trazas del nodo, recalculándolas con funcion(datos, **parametros) solo si
+        no están en la caché. La clave incluye el código de funcion (ver huella_funcion).
+
+        :return: Lista de diccionarios de trazas listos para añadir a una figura.
+        """
+        clave = huella(nombre, huella_funcion(funcion), datos, parametros)
+        self.claves[nombre] = clave
+        texto = self.cache.obtener(clave)
+        if texto is None:
+            texto = serializar_trazas(funcion(datos, **parametros))
+            self.cache.guardar(clave, texto)
+            self.recalculados.append(nombre)
+        self.bytes_nodos[nombre] = len(texto)
+        return json.loads(texto)
+
+    def huella_global(self, *extra):
+        """Huella del conjunto de nodos (en orden de nombre) más parámetros adicionales, por ejemplo el layout."""
+        return huella(sorted(self.claves.items()), *extra)
@@ -0,0 +1,170 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+
+from utils.sketches import HyperLogLog, TDigest
+########################################
+
+
+class _AcumuladorColumna:
+    """Estadísticos combinables de una columna: conteos, momentos (Welford/Chan), extremos y sketches."""
+
+    def __init__(self, compresion, precision_hll):
+        self.tipos = []
+        self.no_nulos = 0
+        self.nulos = 0
+        self.unicos = HyperLogLog(precision_hll)
+        self.numerica = False
+        self.fecha = False
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.cuantiles = TDigest(compresion)
+        self.minimo = None
+        self.maximo = None
+
+    def actualizar(self, serie, numerica, fecha):
+        if str(serie.dtype) not in self.tipos:
+            self.tipos.append(str(serie.dtype))
+        no_nulos = serie.dropna()
+        self.no_nulos += len(no_nulos)
+        self.nulos += len(serie) - len(no_nulos)
+        self.unicos.actualizar(no_nulos)
+
+        if numerica:
+            self.numerica = True
+            valores = no_nulos.to_numpy(dtype="float64")
+            if len(valores):
+                self._combinar_momentos(len(valores), valores.mean(), ((valores - valores.mean()) ** 2).sum())
+                self.cuantiles.actualizar(valores)
+        if fecha:
+            self.fecha = True
+        if (numerica or fecha) and len(no_nulos):
+            self._combinar_extremos(no_nulos.min(), no_nulos.max())
+
+    def _combinar_momentos(self, n, media, m2):
+        total = self.n + n
+        delta = media - self.media
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.media += delta * n / total
+        self.n = total
+
+    def _combinar_extremos(self, minimo, maximo):
+        self.minimo = minimo if self.minimo is None else min(self.minimo, minimo)
+        self.maximo = maximo if self.maximo is None else max(self.maximo, maximo)
+
+    def combinar(self, otro):
+        for tipo in otro.tipos:
+            if tipo not in self.tipos:
+                self.tipos.append(tipo)
+        self.no_nulos += otro.no_nulos
+        self.nulos += otro.nulos
+        self.unicos.combinar(otro.unicos)
+        self.numerica |= otro.numerica
+        self.fecha |= otro.fecha
+        if otro.n:
+            self._combinar_momentos(otro.n, otro.media, otro.m2)
+            self.cuantiles.combinar(otro.cuantiles)
+        if otro.minimo is not None:
+            self._combinar_extremos(otro.minimo, otro.maximo)
+        return self
+
+    @property
+    def tipo(self):
+        if len(self.tipos) == 1:
+            return self.tipos[0]
+        try:
+            return str(np.result_type(*self.tipos))
+        except TypeError:
+            return "object"
+
+
+class PerfilStreaming:
+    """
+    Perfil de un DataFrame calculado chunk a chunk en una sola pasada y con memoria acotada.
+
+    Los perfiles parciales son combinables (combinar), por lo que distintos ficheros o procesos
+    pueden perfilarse por separado y unirse al final. Los cuantiles se estiman con t-digest y los
+    valores únicos con HyperLogLog.
+
+    Ejemplo de uso:
+        perfil = PerfilStreaming()
+        for chunk in pd.read_csv('datos.csv', chunksize=1_000_000):
+            perfil.actualizar(chunk)
+        perfil.resumen()
+    """
+
+    def __init__(self, compresion=200, precision_hll=14):
+        self.compresion = compresion
+        self.precision_hll = precision_hll
+        self.filas = 0
+        self.columnas = {}
+
+    def actualizar(self, chunk):
+        numericas = set(chunk.select_dtypes(include=['number']).columns)
+        fechas = set(chunk.select_dtypes(include=['datetime', 'datetime64[ns]']).columns)
+        self.filas += len(chunk)
+        for columna in chunk.columns:
+            if columna not in self.columnas:
+                self.columnas[columna] = _AcumuladorColumna(self.compresion, self.precision_hll)
+            self.columnas[columna].actualizar(chunk[columna], columna in numericas, columna in fechas)
+        return self
+
+    def combinar(self, otro):
+        self.filas += otro.filas
+        for columna, acumulador in otro.columnas.items():
+            if columna in self.columnas:
+                self.columnas[columna].combinar(acumulador)
+            else:
+                self.columnas[columna] = acumulador
+        return self
+
+    def resumen(self):
+        """
+        Devuelve el resumen con el mismo esquema que tidy_functions.describe_df.
+        """
+        columnas = list(self.columnas)
+        acumuladores = [self.columnas[c] for c in columnas]
+        # Columnas que no aparecen en todos los chunks cuentan como nulas en el resto
+        summary = pd.DataFrame({
+            'Column': columnas,
+            'Data Type': [a.tipo for a in acumuladores],
+            'Non-null Count': [a.no_nulos for a in acumuladores],
+            '% Null Values': [
+                round((self.filas - a.no_nulos) / self.filas * 100, 2) if self.filas else np.nan
+                for a in acumuladores
+            ],
+            'Unique Values': [a.unicos.estimar() for a in acumuladores],
+        }, index=columnas)
+
+        summary['Shape'] = f"{self.filas} rows, {len(columnas)} columns"
+
+        numericas = [(c, a) for c, a in zip(columnas, acumuladores) if a.numerica]
+        if numericas:
+            filas = []
+            for columna, a in numericas:
+                q25, q50, q75 = a.cuantiles.cuantil([0.25, 0.5, 0.75]) if a.n else (np.nan,) * 3
+                filas.append({
+                    'Column': columna,
+                    'mean': a.media if a.n else np.nan,
+                    'median': q50,
+                    'std': np.sqrt(a.m2 / (a.n - 1)) if a.n > 1 else np.nan,
+                    'min': a.minimo if a.n else np.nan,
+                    '25%': q25,
+                    '75%': q75,
+                    'max': a.maximo if a.n else np.nan,
+                })
+            describe_stats = pd.DataFrame(filas)
+            summary = pd.merge(summary, describe_stats, on='Column', how='left')
+
+        fechas = [(c, a) for c, a in zip(columnas, acumuladores) if a.fecha]
+        if fechas:
+            date_ranges = pd.DataFrame({
+                'Column': [c for c, _ in fechas],
+                'Min Date': [a.minimo for _, a in fechas],
+                'Max Date': [a.maximo for _, a in fechas],
+            })
+            summary = pd.merge(summary, date_ranges, on='Column', how='left')
+
+        return summary
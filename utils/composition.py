@@ -0,0 +1,112 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import base64
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+from plotly.subplots import make_subplots
+########################################
+
+# Tipos de NumPy con typed array equivalente en plotly.js
+TIPOS_PLOTLYJS = {
+    "int8": "i1", "uint8": "u1", "int16": "i2", "uint16": "u2",
+    "int32": "i4", "uint32": "u4", "float32": "f4", "float64": "f8",
+}
+
+
+def array_binario(valores):
+    """
+    Codifica un array como typed array de plotly.js ({'dtype', 'bdata'} en base64).
+
+    Las fechas se envían como milisegundos desde 1970 (el eje debe declararse type='date') y los
+    enteros de 64 bits se reducen al menor tipo que los contiene. Los arrays de texto u objetos
+    se devuelven como lista.
+    """
+    if isinstance(valores, (pd.Series, pd.Index)):
+        if pd.api.types.is_datetime64_any_dtype(valores):
+            valores = valores.to_numpy(dtype="datetime64[ms]")
+        else:
+            valores = valores.to_numpy()
+    valores = np.asarray(valores)
+
+    if np.issubdtype(valores.dtype, np.datetime64):
+        valores = valores.astype("datetime64[ms]").astype("int64").astype("float64")
+    elif np.issubdtype(valores.dtype, np.integer) and valores.dtype.itemsize == 8 and len(valores):
+        for tipo in ("int8", "int16", "int32") if valores.dtype.kind == "i" else ("uint8", "uint16", "uint32"):
+            info = np.iinfo(tipo)
+            if valores.min() >= info.min and valores.max() <= info.max:
+                valores = valores.astype(tipo)
+                break
+        else:
+            valores = valores.astype("float64")
+
+    tipo = TIPOS_PLOTLYJS.get(str(valores.dtype))
+    if tipo is None:
+        return valores.tolist()
+    return {"dtype": tipo, "bdata": base64.b64encode(np.ascontiguousarray(valores)).decode("ascii")}
+
+
+def _referencia_celda(figura, fila, columna):
+    """
+    Propiedades que asignan una traza a la celda (fila, columna) de un grid de make_subplots:
+    {'xaxis': 'x2', 'yaxis': 'y2'}, {'domain': {...}}, {'scene': 'scene2'} o {'subplot': 'polar2'}.
+    """
+    celda = figura.get_subplot(fila, columna)
+    if celda is None:
+        raise ValueError(f"La celda ({fila}, {columna}) no tiene subplot.")
+    if hasattr(celda, "plotly_name"):
+        # Subplots con objeto propio en el layout (scene, polar, ternary, geo...)
+        clave = "scene" if celda.plotly_name.startswith("scene") else "subplot"
+        return {clave: celda.plotly_name}
+    if hasattr(celda, "xaxis"):
+        # Ejes cartesianos: 'xaxis2' -> 'x2'
+        return {
+            "xaxis": celda.xaxis.plotly_name.replace("axis", ""),
+            "yaxis": celda.yaxis.plotly_name.replace("axis", ""),
+        }
+    return {"domain": {"x": celda.x, "y": celda.y}}
+
+
+def componer_grid(paneles, layout=None, **kwargs_subplots):
+    """
+    Compone un grid de subplots a partir de especificaciones de trazas (diccionarios).
+
+    make_subplots solo se usa para calcular los dominios y ejes de cada celda (sin trazas), y las
+    trazas se asignan a su celda escribiendo xaxis/yaxis o domain en su diccionario, sin pasar
+    por add_trace (que valida y copia cada traza).
+
+    Parámetros:
+        paneles (list): Diccionarios con 'fila', 'columna', 'trazas' y opcionalmente 'eje_x' y
+            'eje_y' (propiedades de los ejes de esa celda, por ejemplo {'type': 'date'}).
+        layout (dict, opcional): Propiedades generales del layout (altura, título, plantilla...).
+        **kwargs_subplots: Argumentos de make_subplots (rows, cols, specs, subplot_titles...).
+
+    Retorna:
+        dict: Figura {'data': [...], 'layout': {...}} lista para escribir_html().
+    """
+    base = make_subplots(**kwargs_subplots)
+    if layout:
+        base.update_layout(**layout)
+
+    datos = []
+    for panel in paneles:
+        fila, columna = panel["fila"], panel["columna"]
+        if panel.get("eje_x"):
+            base.update_xaxes(row=fila, col=columna, **panel["eje_x"])
+        if panel.get("eje_y"):
+            base.update_yaxes(row=fila, col=columna, **panel["eje_y"])
+        referencia = _referencia_celda(base, fila, columna)
+        datos.extend({**traza, **referencia} for traza in panel["trazas"])
+
+    return {"data": datos, "layout": base.to_dict()["layout"]}
+
+
+def escribir_html(figura, ruta, include_plotlyjs="directory"):
+    """
+    Escribe la figura compuesta en HTML sin volver a validarla.
+
+    Con include_plotlyjs='directory' la página enlaza un plotly.min.js compartido que se copia una
+    sola vez en la carpeta de destino, en lugar de incrustar la librería en cada HTML.
+    """
+    pio.write_html(figura, ruta, include_plotlyjs=include_plotlyjs, validate=False)
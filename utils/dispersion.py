@@ -0,0 +1,212 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+########################################
+
+# Elementos máximos de cada bloque de ventanas (ventanas x tickers x sesiones). Cada métrica crea
+# unos pocos arrays temporales de este tamaño, así que la memoria no depende del universo.
+ELEMENTOS_POR_BLOQUE = 500_000
+
+
+def _matrices(df, x="Open", y="Close"):
+    """
+    Coloca las sesiones de cada ticker en matrices (sesiones x tickers) sin bucles por ticker.
+
+    La fila i de cada columna es la i-ésima sesión de ese ticker (no la i-ésima fecha del calendario
+    común), de modo que una sesión que falta en un ticker no afecta a sus ventanas ni a las de los
+    demás. Las columnas de los tickers con menos sesiones se rellenan con NaN al final.
+    """
+    df = df.dropna(subset=[x, y]).sort_values(["Ticker", "Date"])
+    codigos, tickers = pd.factorize(df["Ticker"], sort=True)
+    sesion = df.groupby(codigos, sort=False).cumcount().to_numpy()
+    n_sesiones = sesion.max() + 1 if len(sesion) else 0
+
+    fechas = np.full((n_sesiones, len(tickers)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    matriz_x = np.full((n_sesiones, len(tickers)), np.nan)
+    matriz_y = np.full((n_sesiones, len(tickers)), np.nan)
+    fechas[sesion, codigos] = df["Date"].to_numpy(dtype="datetime64[ns]")
+    matriz_x[sesion, codigos] = df[x].to_numpy(dtype="float64")
+    matriz_y[sesion, codigos] = df[y].to_numpy(dtype="float64")
+    return fechas, tickers, matriz_x, matriz_y
+
+
+def _cadena(x, y):
+    """
+    Suma del producto cruzado de las aristas de la cadena convexa inferior (cadena monótona de
+    Andrew) de cada fila, con los puntos ya ordenados por x.
+
+    El algoritmo recorre los W puntos en orden y vectoriza la pila sobre todas las filas: en cada
+    paso se retiran a la vez los vértices que dejan de ser convexos en cualquier fila.
+
+    :param x: Array (M, W) de coordenadas x ordenadas de menor a mayor en cada fila.
+    :param y: Array (M, W) de coordenadas y en el mismo orden.
+    :return: Array (M,) con la suma de x_i * y_(i+1) - x_(i+1) * y_i a lo largo de la cadena.
+    """
+    filas, n_puntos = x.shape
+    idx = np.arange(filas)
+    pila = np.zeros((filas, n_puntos), dtype=np.intp)
+    altura = np.zeros(filas, dtype=np.intp)
+    for k in range(n_puntos):
+        while True:
+            activa = altura >= 2
+            a = pila[idx, np.maximum(altura - 2, 0)]
+            b = pila[idx, np.maximum(altura - 1, 0)]
+            cruz = ((x[idx, b] - x[idx, a]) * (y[:, k] - y[idx, a])
+                    - (y[idx, b] - y[idx, a]) * (x[:, k] - x[idx, a]))
+            retirar = activa & (cruz <= 0)
+            if not retirar.any():
+                break
+            altura -= retirar
+        pila[idx, altura] = k
+        altura += 1
+
+    # Aristas consecutivas de la pila; las posiciones por encima de la altura no cuentan
+    px = np.take_along_axis(x, pila, axis=1)
+    py = np.take_along_axis(y, pila, axis=1)
+    aristas = px[:, :-1] * py[:, 1:] - px[:, 1:] * py[:, :-1]
+    return np.where(np.arange(1, n_puntos) < altura[:, None], aristas, 0.0).sum(axis=1)
+
+
+def _area_envolvente(vx, vy):
+    """
+    Área exacta de la envolvente convexa de cada ventana.
+
+    Los puntos de cada ventana se ordenan por (x, y); la cadena inferior recorre los puntos de
+    izquierda a derecha y la superior de derecha a izquierda, y juntas cierran el polígono, cuya
+    área se obtiene con la fórmula del lazo.
+
+    :param vx: Array (..., W) de coordenadas x de cada ventana.
+    :param vy: Array (..., W) de coordenadas y de cada ventana.
+    :return: Array (...) con el área de cada ventana.
+    """
+    forma = vx.shape[:-1]
+    x = vx.reshape(-1, vx.shape[-1])
+    y = vy.reshape(-1, vy.shape[-1])
+    orden = np.lexsort((y, x), axis=-1)
+    x = np.take_along_axis(x, orden, axis=1)
+    y = np.take_along_axis(y, orden, axis=1)
+
+    inferior = _cadena(x, y)
+    superior = _cadena(x[:, ::-1], y[:, ::-1])
+    return (0.5 * np.abs(inferior + superior)).reshape(forma)
+
+
+def _metricas_celdas(vx, vy):
+    """Calcula las métricas de un bloque de ventanas (..., W)."""
+    # Distancia con signo de cada punto a la recta y = x (positiva: cierre por encima de apertura)
+    desviacion = (vy - vx) / np.sqrt(2)
+    spread = np.abs(vy - vx)
+    p05, p50, p95 = np.percentile(desviacion, [5, 50, 95], axis=-1)
+    return {
+        "Area": _area_envolvente(vx, vy),
+        "Desv_Media": desviacion.mean(axis=-1),
+        "Desv_Std": desviacion.std(axis=-1),
+        "Desv_P05": p05,
+        "Desv_P50": p50,
+        "Desv_P95": p95,
+        "Pct_Sobre_Diagonal": (desviacion > 0).mean(axis=-1) * 100,
+        "Spread_Medio": spread.mean(axis=-1),
+        "Spread_Max": spread.max(axis=-1),
+        "Spread_Rel_Medio": (spread / np.abs(vx)).mean(axis=-1),
+    }
+
+
+def _metricas_ventana(x, y, ventana):
+    """
+    Calcula todas las métricas para un tamaño de ventana sobre matrices (sesiones x tickers).
+
+    Las ventanas se procesan en bloques de ventanas y tickers de como mucho ELEMENTOS_POR_BLOQUE
+    elementos, de modo que los arrays intermedios no crecen con el universo ni con el histórico.
+    """
+    n_sesiones, n_tickers = x.shape
+    n_ventanas = n_sesiones - ventana + 1
+    if n_ventanas <= 0:
+        return {}
+
+    vx = sliding_window_view(x, ventana, axis=0)                         # (N, T, W), sin copia
+    vy = sliding_window_view(y, ventana, axis=0)
+    # Solo el relleno final de los tickers con menos sesiones es NaN
+    incompleta = np.isnan(vx[..., -1]) | np.isnan(vy[..., -1])
+
+    bloque_t = min(n_tickers, max(1, ELEMENTOS_POR_BLOQUE // ventana))
+    bloque_v = max(1, ELEMENTOS_POR_BLOQUE // (bloque_t * ventana))
+    metricas = {}
+    for inicio in range(0, n_ventanas, bloque_v):
+        fin = min(inicio + bloque_v, n_ventanas)
+        for t_inicio in range(0, n_tickers, bloque_t):
+            t_fin = min(t_inicio + bloque_t, n_tickers)
+            # Las ventanas incompletas dan NaN (sin avisos) y se descartan al final
+            with np.errstate(divide="ignore", invalid="ignore"):
+                bloque = _metricas_celdas(vx[inicio:fin, t_inicio:t_fin], vy[inicio:fin, t_inicio:t_fin])
+            for nombre, valores in bloque.items():
+                if nombre not in metricas:
+                    metricas[nombre] = np.empty((n_ventanas, n_tickers))
+                metricas[nombre][inicio:fin, t_inicio:t_fin] = valores
+
+    for nombre in metricas:
+        metricas[nombre][incompleta] = np.nan
+    return metricas
+
+
+def _metricas_bloque(df, ventanas):
+    fechas, tickers, x, y = _matrices(df)
+    frames = []
+    for ventana in ventanas:
+        metricas = _metricas_ventana(x, y, ventana)
+        if not metricas:
+            continue
+        n_ventanas = len(fechas) - ventana + 1
+        frame = pd.DataFrame({
+            # Fecha de la última sesión de cada ventana, en el calendario de su ticker
+            "Date": fechas[ventana - 1:].ravel(),
+            "Ticker": np.tile(np.asarray(tickers), n_ventanas),
+            "Ventana": ventana,
+            **{nombre: valores.ravel() for nombre, valores in metricas.items()},
+        })
+        frames.append(frame.dropna(subset=["Area"]))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def metricas_dispersion(df, ventanas=(20, 60), n_procesos=None):
+    """
+    Calcula métricas móviles de dispersión Open/Close para todos los tickers y ventanas a la vez.
+
+    Las métricas se calculan con NumPy sobre vistas deslizantes de la matriz (sesiones x tickers),
+    sin bucles por ticker y por bloques de ventanas de memoria acotada. Cada ventana son las últimas N sesiones de su ticker,
+    aunque otros tickers coticen en fechas distintas:
+        - Area: área exacta de la envolvente convexa (Open, Close) de la ventana.
+        - Desv_*: distribución de la distancia con signo de cada punto a la recta y = x.
+        - Pct_Sobre_Diagonal: % de sesiones con cierre por encima de la apertura.
+        - Spread_*: estadísticos de |Close - Open| (absoluto y relativo a Open).
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy con Date, Ticker, Open y Close.
+        ventanas (list, opcional): Tamaños de ventana en sesiones. Por defecto (20, 60).
+        n_procesos (int, opcional): Si se indica, reparte los tickers entre un pool de procesos.
+
+    Retorna:
+        pd.DataFrame: Una fila por (Date, Ticker, Ventana) con las métricas.
+
+    Ejemplo de uso:
+        metricas = metricas_dispersion(df, ventanas=[20, 60, 120], n_procesos=4)
+    """
+    columnas = ["Date", "Ticker", "Open", "Close"]
+    df = df[columnas]
+
+    if not n_procesos or n_procesos <= 1:
+        resultado = _metricas_bloque(df, ventanas)
+    else:
+        tickers = df["Ticker"].unique()
+        grupos = [g for g in np.array_split(np.asarray(tickers, dtype=object), n_procesos) if len(g)]
+        bloques = [df[df["Ticker"].isin(grupo)] for grupo in grupos]
+        with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+            partes = list(pool.map(_metricas_bloque, bloques, [ventanas] * len(bloques)))
+        resultado = pd.concat(partes, ignore_index=True)
+
+    if resultado.empty:
+        return resultado
+    return resultado.sort_values(["Ventana", "Ticker", "Date"]).reset_index(drop=True)
@@ -0,0 +1,217 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+########################################
+
+
+def envolvente_convexa(puntos):
+    """
+    Calcula la envolvente convexa de un conjunto de puntos 2D (algoritmo de la cadena monótona).
+
+    :param puntos: Array (n, 2) de puntos.
+    :return: Array (h, 2) con los vértices de la envolvente en sentido antihorario, sin puntos colineales.
+    """
+    puntos = np.unique(np.asarray(puntos, dtype="float64").reshape(-1, 2), axis=0)
+    if len(puntos) < 3:
+        return puntos
+
+    def cadena(secuencia):
+        resultado = []
+        for p in secuencia:
+            while len(resultado) >= 2 and _cruz(resultado[-2], resultado[-1], p) <= 0:
+                resultado.pop()
+            resultado.append(p)
+        return resultado
+
+    inferior = cadena(puntos)
+    superior = cadena(puntos[::-1])
+    return np.array(inferior[:-1] + superior[:-1])
+
+
+def _cruz(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def puntos_fuera(vertices, puntos):
+    """
+    Indica, de forma vectorizada, qué puntos quedan fuera de la envolvente dada.
+
+    :param vertices: Vértices de la envolvente en sentido antihorario.
+    :param puntos: Array (k, 2) de puntos a comprobar.
+    :return: Array booleano (k,) con True para los puntos exteriores.
+    """
+    puntos = np.asarray(puntos, dtype="float64").reshape(-1, 2)
+    if len(vertices) < 3:
+        return np.ones(len(puntos), dtype=bool)
+
+    origen = vertices
+    destino = np.roll(vertices, -1, axis=0)
+    # Producto vectorial (k, h) de cada arista con cada punto: negativo => a la derecha => fuera
+    cruz = (
+        (destino[:, 0] - origen[:, 0])[None, :] * (puntos[:, 1:2] - origen[:, 1][None, :])
+        - (destino[:, 1] - origen[:, 1])[None, :] * (puntos[:, 0:1] - origen[:, 0][None, :])
+    )
+    return (cruz < 0).any(axis=1)
+
+
+def area_envolvente(vertices):
+    """Área del polígono (fórmula del área de Gauss)."""
+    if len(vertices) < 3:
+        return 0.0
+    x, y = vertices[:, 0], vertices[:, 1]
+    return float(0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def perimetro_envolvente(vertices):
+    """Perímetro del polígono (longitud de un segmento si hay dos vértices)."""
+    if len(vertices) < 2:
+        return 0.0
+    if len(vertices) == 2:
+        return float(np.linalg.norm(vertices[1] - vertices[0]))
+    return float(np.linalg.norm(np.roll(vertices, -1, axis=0) - vertices, axis=1).sum())
+
+
+def _unir(a, b):
+    if len(a) == 0:
+        return b
+    if len(b) == 0:
+        return a
+    return envolvente_convexa(np.vstack([a, b]))
+
+
+class EnvolventeIncremental:
+    """
+    Envolvente convexa que se actualiza con nuevas barras sin recalcularse desde cero.
+
+    Los puntos nuevos se comprueban contra la envolvente actual; los interiores se descartan y
+    solo si alguno queda fuera se recalcula la envolvente sobre los vértices actuales más esos
+    puntos (hull(S ∪ P) = hull(hull(S) ∪ P)).
+
+    Ejemplo de uso:
+        env = EnvolventeIncremental()
+        env.agregar(df[["Open", "Close"]].values)
+        env.area, env.perimetro
+    """
+
+    def __init__(self, puntos=None):
+        self.vertices = np.empty((0, 2))
+        if puntos is not None:
+            self.agregar(puntos)
+
+    def agregar(self, puntos):
+        """
+        Incorpora nuevos puntos a la envolvente.
+
+        :param puntos: Array (k, 2) o un único punto (x, y).
+        :return: True si la envolvente ha cambiado.
+        """
+        puntos = np.asarray(puntos, dtype="float64").reshape(-1, 2)
+        exteriores = puntos[puntos_fuera(self.vertices, puntos)]
+        if len(exteriores) == 0:
+            return False
+        self.vertices = _unir(self.vertices, exteriores)
+        return True
+
+    @property
+    def area(self):
+        return area_envolvente(self.vertices)
+
+    @property
+    def perimetro(self):
+        return perimetro_envolvente(self.vertices)
+
+
+class EnvolventeVentana:
+    """
+    Envolvente convexa de los últimos `ventana` puntos con actualizaciones amortizadas.
+
+    Implementa la cola de dos pilas: la pila trasera mantiene la envolvente incremental de los
+    puntos recién llegados y la delantera guarda las envolventes de los sufijos de los puntos más
+    antiguos. Al expirar un punto se desapila un sufijo; cuando la pila delantera se vacía se
+    reconstruye a partir de la trasera. Cada punto se procesa un número constante de veces, y la
+    consulta une solo dos envolventes (unos pocos vértices cada una).
+
+    Ejemplo de uso:
+        env = EnvolventeVentana(ventana=60)
+        for punto in df[["Open", "Close"]].values:
+            env.agregar(punto)
+            env.area
+    """
+
+    def __init__(self, ventana):
+        if ventana < 1:
+            raise ValueError("El tamaño de la ventana debe ser al menos 1.")
+        self.ventana = ventana
+        self._delantera = []        # envolventes de sufijos (la última es la del más antiguo)
+        self._trasera = []          # puntos recién llegados
+        self._envolvente_trasera = EnvolventeIncremental()
+        self._vertices = None
+
+    def __len__(self):
+        return len(self._delantera) + len(self._trasera)
+
+    def _reconstruir(self):
+        acumulada = np.empty((0, 2))
+        for punto in reversed(self._trasera):
+            if len(acumulada) < 3 or puntos_fuera(acumulada, punto).any():
+                acumulada = _unir(acumulada, punto.reshape(1, 2))
+            self._delantera.append(acumulada)
+        self._trasera = []
+        self._envolvente_trasera = EnvolventeIncremental()
+
+    def agregar(self, punto):
+        """
+        Añade un punto (x, y) y descarta el más antiguo si se supera la ventana.
+
+        :param punto: Punto (x, y).
+        """
+        punto = np.asarray(punto, dtype="float64").reshape(2)
+        self._trasera.append(punto)
+        self._envolvente_trasera.agregar(punto)
+        if len(self) > self.ventana:
+            if not self._delantera:
+                self._reconstruir()
+            self._delantera.pop()
+        self._vertices = None
+
+    @property
+    def vertices(self):
+        if self._vertices is None:
+            delantera = self._delantera[-1] if self._delantera else np.empty((0, 2))
+            self._vertices = _unir(delantera, self._envolvente_trasera.vertices)
+        return self._vertices
+
+    @property
+    def area(self):
+        return area_envolvente(self.vertices)
+
+    @property
+    def perimetro(self):
+        return perimetro_envolvente(self.vertices)
+
+
+def serie_envolvente(df, ventana=None, columnas=("Open", "Close")):
+    """
+    Calcula, para cada ticker y cada fecha, el área y el perímetro de la envolvente convexa.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy con Date, Ticker y las columnas indicadas.
+        ventana (int, opcional): Número de sesiones de la ventana móvil (por ejemplo 60).
+                                 Si es None, la envolvente acumula todo el histórico.
+        columnas (tuple, opcional): Columnas (x, y) de los puntos. Por defecto ('Open', 'Close').
+
+    Retorna:
+        pd.DataFrame: Columnas Date, Ticker, Area, Perimetro y Vertices.
+
+    Ejemplo de uso:
+        serie = serie_envolvente(df, ventana=60)
+    """
+    filas = []
+    for ticker, sub_df in df.sort_values("Date").groupby("Ticker", observed=True, sort=False):
+        env = EnvolventeVentana(ventana) if ventana else EnvolventeIncremental()
+        for fecha, punto in zip(sub_df["Date"], sub_df[list(columnas)].to_numpy(dtype="float64")):
+            env.agregar(punto)
+            vertices = env.vertices
+            filas.append((fecha, ticker, area_envolvente(vertices), perimetro_envolvente(vertices), len(vertices)))
+    return pd.DataFrame(filas, columns=["Date", "Ticker", "Area", "Perimetro", "Vertices"])
@@ -0,0 +1,450 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import logging
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import actualizar_agregados
+from utils.storage import COLUMNAS_OHLCV, abrir_dataset, cargar_dataset, guardar_dataset
+########################################
+
+logger = logging.getLogger(__name__)
+
+# Claves que identifican una fila del DataFrame tidy
+CLAVES = ["Date", "Ticker"]
+
+# Columnas de precio del esquema OHLCV
+COLUMNAS_PRECIO = ["Open", "High", "Low", "Close"]
+
+# Rango ya solicitado por ticker, en la raíz del almacén (pyarrow ignora los ficheros que empiezan por '_')
+FICHERO_COBERTURA = "_cobertura.parquet"
+
+
+def limpiar_ohlcv(df, precision="float64"):
+    """
+    Selecciona las columnas del esquema tidy y asegura sus tipos de datos.
+
+    Un Ticker categórico se conserva como tal; en otro caso se convierte a str.
+
+    :param df: DataFrame con al menos las columnas Date, Ticker, Open, High, Low, Close y Volume.
+    :param precision: Tipo de las columnas de precio, 'float64' (por defecto) o 'float32'.
+    :return: DataFrame con las columnas en orden y tipos datetime64, str, float e int64.
+    """
+    df = df[COLUMNAS_OHLCV].copy()
+    df["Date"] = pd.to_datetime(df["Date"])            # datetime64
+    if not isinstance(df["Ticker"].dtype, pd.CategoricalDtype):
+        df["Ticker"] = df["Ticker"].astype(str)        # string
+    for col in COLUMNAS_PRECIO:
+        df[col] = df[col].astype(precision)            # float64 / float32
+    df["Volume"] = df["Volume"].astype("int64")        # int64
+    return df
+
+
+def aplanar_descarga(data, precision="float64"):
+    """
+    Convierte la descarga de yfinance (columnas MultiIndex Ticker x Precio) al formato tidy
+    en una única pasada vectorizada.
+
+    Sustituye al bucle que copiaba data[ticker] para cada ticker, añadía la columna Ticker,
+    hacía reset_index y concatenaba: apilar el nivel Ticker produce directamente el formato largo.
+
+    :param data: DataFrame devuelto por yf.download(..., group_by="ticker").
+    :param precision: Tipo de las columnas de precio, 'float64' (por defecto) o 'float32'.
+    :return: DataFrame tidy con Ticker categórico.
+    """
+    if precision not in ("float64", "float32"):
+        raise ValueError(f"Precisión '{precision}' no soportada. Opciones: ['float64', 'float32']")
+
+    campos = COLUMNAS_PRECIO + ["Volume"]
+    largo = data.stack(level=0, future_stack=True)[campos]
+    largo = largo.dropna(subset=COLUMNAS_PRECIO)
+
+    fechas = largo.index.get_level_values(0)
+    tickers = largo.index.get_level_values(1)
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(fechas),
+        "Ticker": pd.Categorical(tickers),
+        **{col: largo[col].to_numpy(dtype=precision) for col in COLUMNAS_PRECIO},
+        "Volume": largo["Volume"].to_numpy(dtype="int64"),
+    })
+    return df
+
+
+def compactar_ohlcv(df, tolerancia_relativa=1e-6):
+    """
+    Convierte el DataFrame tidy a un esquema compacto (opcional) y documenta la precisión perdida.
+
+    - Ticker pasa a categórico.
+    - Cada columna de precio pasa a float32 si el error relativo máximo de la conversión
+      no supera tolerancia_relativa; si lo supera, se mantiene en float64.
+    - Volume pasa a uint32 (o uint64 si no cabe); si hay valores negativos se mantiene en int64.
+
+    Las agrupaciones y gráficos del dashboard funcionan igual sobre el DataFrame compacto.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy con las columnas del esquema OHLCV.
+        tolerancia_relativa (float, opcional): Error relativo máximo admitido al pasar a float32.
+
+    Retorna:
+        tuple: (DataFrame compacto, DataFrame con el informe de precisión por columna).
+
+    Ejemplo de uso:
+        df_compacto, informe = compactar_ohlcv(df)
+    """
+    compacto = df.copy()
+    filas_informe = []
+
+    def registrar(col, original, convertido, error_abs=0.0, error_rel=0.0):
+        filas_informe.append({
+            "Column": col,
+            "Original Type": str(original.dtype),
+            "Compact Type": str(convertido.dtype),
+            "Max Abs Error": error_abs,
+            "Max Rel Error": error_rel,
+            "Original MB": round(original.memory_usage(deep=True, index=False) / 1024 ** 2, 3),
+            "Compact MB": round(convertido.memory_usage(deep=True, index=False) / 1024 ** 2, 3),
+        })
+
+    if not isinstance(df["Ticker"].dtype, pd.CategoricalDtype):
+        compacto["Ticker"] = df["Ticker"].astype("category")
+    registrar("Ticker", df["Ticker"], compacto["Ticker"])
+
+    for col in COLUMNAS_PRECIO:
+        original = df[col].to_numpy(dtype="float64")
+        reducido = original.astype("float32")
+        error_abs = np.abs(reducido.astype("float64") - original)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            error_rel = np.where(original != 0, error_abs / np.abs(original), 0.0)
+        max_abs = float(np.nanmax(error_abs)) if len(original) else 0.0
+        max_rel = float(np.nanmax(error_rel)) if len(original) else 0.0
+        if max_rel <= tolerancia_relativa:
+            compacto[col] = reducido
+        registrar(col, df[col], compacto[col], max_abs, max_rel)
+
+    volumen = df["Volume"]
+    if len(volumen) and volumen.min() >= 0:
+        compacto["Volume"] = volumen.astype("uint32" if volumen.max() <= np.iinfo("uint32").max else "uint64")
+    registrar("Volume", volumen, compacto["Volume"])
+
+    return compacto, pd.DataFrame(filas_informe)
+
+
+def descargar_yfinance(tickers, inicio, fin):
+    """
+    Fetcher por defecto: descarga cotizaciones diarias de yfinance y las devuelve en formato tidy.
+
+    Cualquier callable con la firma (tickers, inicio, fin) -> DataFrame tidy puede sustituirlo
+    en ingestar(), por ejemplo un generador local para pruebas.
+
+    :param tickers: Lista de tickers.
+    :param inicio: Fecha de inicio (incluida).
+    :param fin: Fecha de fin (excluida).
+    :return: DataFrame con las columnas Date, Ticker, Open, High, Low, Close y Volume.
+    :raises ConnectionError: Si falta algún ticker en la descarga.
+
+    yf.download no lanza excepciones cuando falla un símbolo: lo devuelve con todas sus filas
+    vacías. Por eso se comparan los tickers recibidos con los solicitados y se lanza
+    ConnectionError si falta alguno, de modo que _descargar_lote reintente ticker a ticker e
+    informe de los que sigan fallando. Solo un rango sin días laborables se acepta vacío.
+    """
+    import yfinance as yf
+
+    tickers = list(tickers)
+    if len(pd.bdate_range(inicio, fin, inclusive="left")) == 0:
+        return pd.DataFrame(columns=COLUMNAS_OHLCV)
+
+    data = yf.download(tickers, start=inicio, end=fin, group_by="ticker", progress=False)
+    # Reorganizamos el DataFrame a formato plano
+    df = aplanar_descarga(data) if data is not None and not data.empty else pd.DataFrame(columns=COLUMNAS_OHLCV)
+
+    faltantes = sorted(set(tickers) - set(df["Ticker"].astype(str).unique()))
+    if faltantes:
+        raise ConnectionError(f"yfinance no devolvió datos para {faltantes}")
+    return df
+
+
+def marcas_de_agua(ruta_base):
+    """
+    Calcula, para cada ticker del almacén, la primera y la última fecha guardadas.
+
+    Solo se leen las columnas Ticker y Date.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :return: DataFrame indexado por Ticker con las columnas 'min' y 'max'.
+    """
+    if not os.path.isdir(ruta_base):
+        return pd.DataFrame(columns=["min", "max"], index=pd.Index([], name="Ticker"))
+
+    tabla = abrir_dataset(ruta_base).to_table(columns=["Ticker", "Date"])
+    marcas = tabla.group_by("Ticker").aggregate([("Date", "min"), ("Date", "max")]).to_pandas()
+    marcas = marcas.rename(columns={"Date_min": "min", "Date_max": "max"})
+    return marcas.set_index("Ticker")[["min", "max"]]
+
+
+def cargar_cobertura(ruta_base):
+    """
+    Lee el rango de fechas ya solicitado al fetcher para cada ticker.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :return: DataFrame indexado por Ticker con las columnas 'inicio' (incluida) y 'fin' (excluida).
+    """
+    ruta = os.path.join(ruta_base, FICHERO_COBERTURA)
+    if not os.path.exists(ruta):
+        return pd.DataFrame(columns=["inicio", "fin"], index=pd.Index([], name="Ticker"))
+    return pd.read_parquet(ruta)
+
+
+def registrar_cobertura(ruta_base, cubiertos):
+    """
+    Amplía la cobertura guardada con los rangos descargados sin error.
+
+    Los rangos pendientes siempre son contiguos a la cobertura previa, así que basta con
+    guardar el mínimo de los inicios y el máximo de los fines de cada ticker.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :param cubiertos: Lista de tuplas (ticker, inicio, fin).
+    """
+    if not cubiertos:
+        return
+    nuevos = pd.DataFrame(cubiertos, columns=["Ticker", "inicio", "fin"]).set_index("Ticker")
+    cobertura = pd.concat([cargar_cobertura(ruta_base), nuevos])
+    cobertura = cobertura.groupby(level="Ticker").agg({"inicio": "min", "fin": "max"})
+
+    os.makedirs(ruta_base, exist_ok=True)
+    cobertura.astype("datetime64[ns]").to_parquet(os.path.join(ruta_base, FICHERO_COBERTURA))
+
+
+def marcas_con_cobertura(marcas, cobertura):
+    """
+    Amplía las marcas de agua con la cobertura solicitada, de modo que un rango sin sesiones
+    (festivos, fines de semana, tickers sin datos) no se vuelva a pedir en cada ejecución.
+
+    :param marcas: DataFrame devuelto por marcas_de_agua().
+    :param cobertura: DataFrame devuelto por cargar_cobertura().
+    :return: DataFrame indexado por Ticker con las columnas 'min' y 'max'.
+    """
+    if cobertura.empty:
+        return marcas
+    solicitadas = pd.DataFrame({
+        "min": cobertura["inicio"],
+        "max": cobertura["fin"] - pd.Timedelta(days=1),
+    })
+    return pd.concat([marcas, solicitadas]).groupby(level=0).agg({"min": "min", "max": "max"})
+
+
+def rangos_pendientes(tickers, inicio, fin, marcas):
+    """
+    Determina los rangos de fechas que faltan en el almacén para cada ticker.
+
+    :param tickers: Lista de tickers solicitados.
+    :param inicio: Fecha de inicio (incluida).
+    :param fin: Fecha de fin (excluida).
+    :param marcas: DataFrame devuelto por marcas_de_agua() o marcas_con_cobertura().
+    :return: Diccionario {(inicio, fin): [tickers]} con los rangos a descargar.
+    """
+    inicio, fin = pd.Timestamp(inicio), pd.Timestamp(fin)
+    un_dia = pd.Timedelta(days=1)
+
+    rangos = {}
+    for ticker in tickers:
+        if ticker not in marcas.index:
+            pendientes = [(inicio, fin)]
+        else:
+            minimo = pd.Timestamp(marcas.at[ticker, "min"])
+            maximo = pd.Timestamp(marcas.at[ticker, "max"])
+            pendientes = []
+            if inicio < minimo:
+                pendientes.append((inicio, min(minimo, fin)))
+            if maximo + un_dia < fin:
+                pendientes.append((max(maximo + un_dia, inicio), fin))
+
+        for rango in pendientes:
+            if rango[0] < rango[1]:
+                rangos.setdefault(rango, []).append(ticker)
+    return rangos
+
+
+def anexar_dataset(df_nuevo, ruta_base, ruta_agregados=None):
+    """
+    Añade filas al almacén de forma idempotente, eliminando duplicados por (Date, Ticker).
+
+    Solo se reescriben las particiones (Ticker, Year) afectadas por las filas nuevas.
+
+    :param df_nuevo: DataFrame tidy con las filas a añadir.
+    :param ruta_base: Directorio raíz del almacén.
+    :param ruta_agregados: Carpeta del índice de agregados (ver utils.aggregates) a mantener al día.
+    :return: Número de filas nuevas, es decir, claves (Date, Ticker) que no estaban en el almacén.
+    """
+    if df_nuevo.empty:
+        return 0
+
+    df_nuevo = limpiar_ohlcv(df_nuevo)
+    filas_previas = 0
+    if os.path.isdir(ruta_base):
+        anios = df_nuevo["Date"].dt.year
+        existente = cargar_dataset(
+            ruta_base,
+            tickers=df_nuevo["Ticker"].unique(),
+            fecha_inicio=f"{anios.min()}-01-01",
+            fecha_fin=f"{anios.max() + 1}-01-01",
+        )
+        # Solo las particiones que se van a sobrescribir
+        afectadas = pd.MultiIndex.from_arrays([df_nuevo["Ticker"], anios]).unique()
+        en_particion = pd.MultiIndex.from_arrays(
+            [existente["Ticker"].astype(str), existente["Date"].dt.year]
+        ).isin(afectadas)
+        filas_previas = int(en_particion.sum())
+        df_nuevo = pd.concat([existente[en_particion], df_nuevo], ignore_index=True)
+
+    df_final = (
+        df_nuevo.drop_duplicates(subset=CLAVES, keep="last")
+        .sort_values(["Ticker", "Date"])
+        .reset_index(drop=True)
+    )
+    guardar_dataset(df_final, ruta_base)
+    if ruta_agregados is not None:
+        actualizar_agregados(df_final, ruta_agregados, ruta_base)
+    return len(df_final) - filas_previas
+
+
+def _con_reintentos(funcion, reintentos, espera_base):
+    """Ejecuta funcion() reintentando con espera exponencial (y jitter) si lanza una excepción."""
+    for intento in range(reintentos + 1):
+        try:
+            return funcion()
+        except Exception:
+            if intento == reintentos:
+                raise
+            time.sleep(espera_base * (2 ** intento) * (1 + random.random()))
+
+
+def _descargar_lote(fetcher, lote, inicio, fin, reintentos, espera_base):
+    """
+    Descarga un lote de tickers. Si el lote falla tras los reintentos, se descarga ticker a ticker
+    para que un símbolo defectuoso no invalide al resto.
+
+    :return: Tupla (DataFrame o None, {ticker: error}).
+    """
+    try:
+        return _con_reintentos(lambda: fetcher(lote, inicio, fin), reintentos, espera_base), {}
+    except Exception as e:
+        if len(lote) == 1:
+            return None, {lote[0]: repr(e)}
+
+    frames, fallidos = [], {}
+    for ticker in lote:
+        try:
+            frames.append(_con_reintentos(lambda: fetcher([ticker], inicio, fin), reintentos, espera_base))
+        except Exception as e:
+            fallidos[ticker] = repr(e)
+    frames = [f for f in frames if f is not None and not f.empty]
+    return (pd.concat(frames, ignore_index=True) if frames else None), fallidos
+
+
+def iterar_descargas(tickers, inicio, fin, fetcher=descargar_yfinance, tam_lote=25, max_workers=4,
+                     reintentos=3, espera_base=1.0):
+    """
+    Descarga el universo de tickers en lotes sobre un pool de hilos acotado y entrega cada lote
+    en cuanto termina.
+
+    Como mucho hay 2 * max_workers lotes en vuelo, de modo que nunca se mantienen en memoria
+    todos los DataFrames intermedios: el consumidor procesa (por ejemplo, guarda) cada lote
+    antes de que se lancen los siguientes.
+
+    Parámetros:
+        tickers (list): Tickers a descargar.
+        inicio (str o Timestamp): Fecha de inicio (incluida).
+        fin (str o Timestamp): Fecha de fin (excluida).
+        fetcher (callable, opcional): Función (tickers, inicio, fin) -> DataFrame tidy.
+        tam_lote (int, opcional): Número de tickers por lote.
+        max_workers (int, opcional): Número de hilos del pool.
+        reintentos (int, opcional): Reintentos por lote (y por ticker si el lote falla).
+        espera_base (float, opcional): Segundos de espera antes del primer reintento.
+
+    Retorna:
+        Generador de tuplas (lote, DataFrame o None, {ticker: error}).
+
+    Ejemplo de uso:
+        for lote, df_lote, fallidos in iterar_descargas(tickers, '2023-01-01', '2025-01-01'):
+            anexar_dataset(df_lote, 'Data/acciones')
+    """
+    tickers = list(tickers)
+    lotes = iter([tickers[i:i + tam_lote] for i in range(0, len(tickers), tam_lote)])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        en_vuelo = {}
+
+        def lanzar():
+            lote = next(lotes, None)
+            if lote is not None:
+                futuro = pool.submit(_descargar_lote, fetcher, lote, inicio, fin, reintentos, espera_base)
+                en_vuelo[futuro] = lote
+            return lote is not None
+
+        while len(en_vuelo) < 2 * max_workers and lanzar():
+            pass
+
+        while en_vuelo:
+            terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                lote = en_vuelo.pop(futuro)
+                df_lote, fallidos = futuro.result()
+                yield lote, df_lote, fallidos
+                lanzar()
+
+
+def ingestar(tickers, inicio, fin, ruta_base, fetcher=descargar_yfinance, tam_lote=25, max_workers=4,
+             reintentos=3, ruta_agregados=None):
+    """
+    Descarga únicamente los rangos de fechas que faltan en el almacén y los añade sin duplicados.
+
+    Los tickers se descargan en lotes concurrentes (ver iterar_descargas) y cada lote se guarda
+    en cuanto llega. Un ticker que falla tras los reintentos no detiene al resto y su rango se
+    vuelve a pedir en la siguiente ejecución; los rangos descargados sin error se registran como
+    cubiertos aunque no tengan sesiones (ver registrar_cobertura). El día en curso nunca se da
+    por cubierto, porque su sesión puede no haber cerrado.
+
+    Parámetros:
+        tickers (list): Tickers a mantener actualizados.
+        inicio (str o Timestamp): Fecha de inicio (incluida).
+        fin (str o Timestamp): Fecha de fin (excluida).
+        ruta_base (str): Directorio raíz del almacén.
+        fetcher (callable, opcional): Función (tickers, inicio, fin) -> DataFrame tidy.
+                                      Por defecto descarga de yfinance.
+        tam_lote (int, opcional): Número de tickers por lote.
+        max_workers (int, opcional): Número de hilos del pool.
+        reintentos (int, opcional): Reintentos por lote y por ticker.
+        ruta_agregados (str, opcional): Carpeta del índice de agregados a mantener al día.
+
+    Retorna:
+        dict: {'filas_nuevas': int, 'fallidos': {ticker: error}}.
+
+    Ejemplo de uso:
+        ingestar(['AAPL', 'MSFT'], '2023-01-01', '2025-01-01', 'Data/acciones')
+    """
+    marcas = marcas_con_cobertura(marcas_de_agua(ruta_base), cargar_cobertura(ruta_base))
+    rangos = rangos_pendientes(tickers, inicio, fin, marcas)
+    hoy = pd.Timestamp.today().normalize()
+
+    resumen = {"filas_nuevas": 0, "fallidos": {}}
+    cubiertos = []
+    for (desde, hasta), grupo in rangos.items():
+        descargas = iterar_descargas(grupo, desde, hasta, fetcher=fetcher, tam_lote=tam_lote,
+                                     max_workers=max_workers, reintentos=reintentos)
+        for lote, df_lote, fallidos in descargas:
+            resumen["fallidos"].update(fallidos)
+            if df_lote is not None and not df_lote.empty:
+                resumen["filas_nuevas"] += anexar_dataset(df_lote, ruta_base, ruta_agregados=ruta_agregados)
+            if desde < min(hasta, hoy):
+                cubiertos += [(t, desde, min(hasta, hoy)) for t in lote if t not in fallidos]
+
+    registrar_cobertura(ruta_base, cubiertos)
+
+    if resumen["fallidos"]:
+        logger.warning("Tickers no descargados: %s", sorted(resumen["fallidos"]))
+    return resumen
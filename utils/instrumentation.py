@@ -0,0 +1,195 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+########################################
+
+logger = logging.getLogger(__name__)
+
+
+def rss_pico_mb():
+    """
+    Memoria residente (RSS) máxima del proceso desde que arrancó, en MB.
+
+    Es un máximo de toda la vida del proceso: tras la etapa más pesada, todas las demás devuelven
+    el mismo valor. Usa resource en Linux/macOS y psutil (si está instalado) en Windows; si no hay
+    forma de medirla devuelve None.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1024 ** 2
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return pico / 1024 ** 2 if sys.platform == "darwin" else pico / 1024
+
+
+def rss_actual_mb():
+    """
+    Memoria residente (RSS) actual del proceso, en MB.
+
+    Usa psutil si está instalado y /proc/self/statm en Linux; si no hay forma de medirla devuelve None.
+    """
+    try:
+        import psutil
+    except ImportError:
+        try:
+            with open("/proc/self/statm", encoding="ascii") as f:
+                paginas = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        return paginas * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+class MuestreoRss:
+    """
+    Pico de RSS de un bloque de código, muestreando la RSS actual desde un hilo en segundo plano.
+
+    A diferencia de rss_pico_mb(), el pico se cuenta solo desde la entrada en el bloque. Los picos
+    más breves que el intervalo de muestreo pueden no registrarse; la RSS al entrar y al salir
+    siempre se incluye. Si la RSS no se puede medir, pico_mb es None.
+
+    Ejemplo de uso:
+        with MuestreoRss() as muestreo:
+            df = cargar_dataset('Data/acciones')
+        print(muestreo.pico_mb)
+    """
+
+    def __init__(self, intervalo=0.01):
+        self.intervalo = intervalo
+        self.pico_mb = None
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="muestreo-rss", daemon=True)
+
+    def iniciar(self):
+        self._actualizar()
+        if self.pico_mb is not None:
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo.is_alive():
+            self._hilo.join()
+        self._actualizar()
+        return self.pico_mb
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excepcion):
+        self.detener()
+        return False
+
+    def _actualizar(self):
+        rss = rss_actual_mb()
+        if rss is not None and (self.pico_mb is None or rss > self.pico_mb):
+            self.pico_mb = rss
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self._actualizar()
+
+
+class Instrumentacion:
+    """
+    Registro de métricas por etapa: tiempo de reloj, variación de RSS durante la etapa, RSS pico
+    de la etapa (ver MuestreoRss), RSS pico del proceso hasta ese momento, filas y bytes de salida.
+
+    Cada etapa se escribe como una línea JSON en ruta_log (un registro por etapa y ejecución,
+    con el mismo identificador de ejecución), lo que permite ver qué etapa se dispara cuando la
+    construcción nocturna tarda más de lo normal. Opcionalmente cada etapa se perfila con cProfile
+    (un fichero .prof por etapa) y/o tracemalloc (pico de memoria de Python de la etapa y líneas que
+    más reservan).
+
+    Ejemplo de uso:
+        inst = Instrumentacion('logs/metricas.jsonl', perfil_cpu=True)
+        with inst.etapa('carga') as registro:
+            df = cargar_dataset('Data/acciones')
+            registro['filas'] = len(df)
+    """
+
+    def __init__(self, ruta_log=None, perfil_cpu=False, perfil_memoria=False, directorio_perfiles="perfiles",
+                 intervalo_rss=0.01):
+        self.ruta_log = ruta_log
+        self.intervalo_rss = intervalo_rss
+        self.perfil_cpu = perfil_cpu
+        self.perfil_memoria = perfil_memoria
+        self.directorio_perfiles = directorio_perfiles
+        self.ejecucion = uuid.uuid4().hex[:12]
+        self.registros = []
+
+    @contextmanager
+    def etapa(self, nombre):
+        """
+        Mide el bloque como una etapa. El diccionario devuelto admite las claves 'filas' y 'bytes'
+        (o cualquier otra métrica) que se añaden al registro.
+        """
+        registro = {"ejecucion": self.ejecucion, "etapa": nombre,
+                    "inicio": datetime.now().isoformat(timespec="milliseconds"), "filas": None, "bytes": None}
+        perfil = cProfile.Profile() if self.perfil_cpu else None
+        traza_propia = self.perfil_memoria and not tracemalloc.is_tracing()
+        if traza_propia:
+            tracemalloc.start()
+        elif self.perfil_memoria:
+            # tracemalloc ya estaba activo: el pico se cuenta desde el inicio de la etapa
+            tracemalloc.reset_peak()
+        rss_inicio = rss_actual_mb()
+        muestreo = MuestreoRss(self.intervalo_rss).iniciar()
+        if perfil is not None:
+            perfil.enable()
+
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro["segundos"] = round(time.perf_counter() - inicio, 6)
+            muestreo.detener()
+            if perfil is not None:
+                perfil.disable()
+                os.makedirs(self.directorio_perfiles, exist_ok=True)
+                registro["perfil"] = os.path.join(self.directorio_perfiles, f"{self.ejecucion}_{nombre.replace('/', '_')}.prof")
+                perfil.dump_stats(registro["perfil"])
+            if self.perfil_memoria:
+                instantanea = tracemalloc.take_snapshot()
+                registro["pico_python_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 3)
+                if traza_propia:
+                    tracemalloc.stop()
+                registro["mayores_reservas"] = [
+                    f"{estadistica.traceback}: {estadistica.size / 1024 ** 2:.2f} MB"
+                    for estadistica in instantanea.statistics("lineno")[:5]
+                ]
+            rss_fin = rss_actual_mb()
+            registro["rss_delta_mb"] = round(rss_fin - rss_inicio, 1) if None not in (rss_inicio, rss_fin) else None
+            registro["rss_pico_etapa_mb"] = round(muestreo.pico_mb, 1) if muestreo.pico_mb is not None else None
+            rss = rss_pico_mb()
+            registro["rss_pico_proceso_mb"] = round(rss, 1) if rss is not None else None
+            self._escribir(registro)
+
+    def _escribir(self, registro):
+        self.registros.append(registro)
+        logger.info("%-22s %8.3f s  ΔRSS %s MB  pico %s MB (del proceso %s MB)  filas %s  bytes %s",
+                    registro["etapa"], registro["segundos"], registro["rss_delta_mb"], registro["rss_pico_etapa_mb"],
+                    registro["rss_pico_proceso_mb"], registro["filas"], registro["bytes"])
+        if self.ruta_log:
+            directorio = os.path.dirname(self.ruta_log)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            with open(self.ruta_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,148 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import html
+import json
+import os
+import re
+
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+from utils.presentation import formatear_unicos
+########################################
+
+# Plantilla JS que carga el fichero del ticker seleccionado bajo demanda.
+# Se usa <script src=...> en lugar de fetch() para que funcione también abriendo el HTML con file://
+_PLANTILLA_JS = """
+<script>
+(function() {
+    var divId = %(div_id)s;
+    var ficheros = %(ficheros)s;
+    var tituloBase = %(titulo)s;
+    var cache = {};
+
+    function dibujar(ticker) {
+        var s = cache[ticker];
+        Plotly.restyle(divId, {
+            x: [s.x], open: [s.open], high: [s.high], low: [s.low], close: [s.close], name: [ticker]
+        }, [0]);
+        Plotly.relayout(divId, {title: tituloBase + ": " + ticker});
+    }
+
+    window.cargarSerieTicker = function(ticker, serie) {
+        cache[ticker] = serie;
+        dibujar(ticker);
+    };
+
+    document.getElementById(divId + "-selector").addEventListener("change", function(evento) {
+        var ticker = evento.target.value;
+        if (cache[ticker]) { dibujar(ticker); return; }
+        var script = document.createElement("script");
+        script.src = ficheros[ticker];
+        document.head.appendChild(script);
+    });
+})();
+</script>
+"""
+
+
+def _nombre_fichero(ticker):
+    return re.sub(r"[^A-Za-z0-9._=-]", "_", str(ticker)) + ".js"
+
+
+def exportar_series_por_ticker(df, directorio, decimales=4):
+    """
+    Escribe la serie OHLC de cada ticker en su propio fichero compacto (JS con un objeto de arrays).
+
+    Cada fichero llama a window.cargarSerieTicker(ticker, serie), de modo que la página solo
+    descarga los datos del ticker que se selecciona.
+
+    :param df: DataFrame tidy con Date, Ticker, Open, High, Low y Close.
+    :param directorio: Carpeta donde se escriben los ficheros.
+    :param decimales: Decimales con los que se redondean los precios.
+    :return: Diccionario {ticker: ruta del fichero}.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {}
+    # Fechas en ISO formateadas una sola vez para todo el DataFrame
+    df = df.assign(_x=formatear_unicos(df["Date"], "%Y-%m-%d"))
+    for ticker, sub_df in df.groupby("Ticker", observed=True, sort=False):
+        serie = {
+            "x": sub_df["_x"].tolist(),
+            **{col.lower(): sub_df[col].round(decimales).tolist() for col in ["Open", "High", "Low", "Close"]},
+        }
+        ruta = os.path.join(directorio, _nombre_fichero(ticker))
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(f"window.cargarSerieTicker({json.dumps(str(ticker))},")
+            json.dump(serie, f, separators=(",", ":"))
+            f.write(");\n")
+        rutas[ticker] = ruta
+    return rutas
+
+
+def escribir_velas_lazy(df, ruta_html, directorio_datos=None, titulo="Evolución de precios OHLC", decimales=4):
+    """
+    Genera una página de velas japonesas que carga cada ticker bajo demanda.
+
+    La página embebe solo el primer ticker; al cambiar el selector se carga el fichero de datos
+    del ticker elegido (ver exportar_series_por_ticker). El tamaño del HTML no crece con el número
+    de tickers y el selector no necesita listas de visibilidad.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy con Date, Ticker, Open, High, Low y Close.
+        ruta_html (str): Ruta del HTML a generar.
+        directorio_datos (str, opcional): Carpeta de los ficheros por ticker. Por defecto,
+                                          '<nombre del html>_datos' junto al HTML.
+        titulo (str, opcional): Título base del gráfico.
+        decimales (int, opcional): Decimales con los que se redondean los precios.
+
+    Ejemplo de uso:
+        escribir_velas_lazy(df, 'velas.html')
+    """
+    if directorio_datos is None:
+        directorio_datos = os.path.splitext(ruta_html)[0] + "_datos"
+    rutas = exportar_series_por_ticker(df, directorio_datos, decimales=decimales)
+
+    tickers = [str(t) for t in df["Ticker"].unique()]
+    primero = df[df["Ticker"] == tickers[0]]
+
+    fig = go.Figure(go.Candlestick(
+        x=primero["Date"],
+        open=primero["Open"].round(decimales),
+        high=primero["High"].round(decimales),
+        low=primero["Low"].round(decimales),
+        close=primero["Close"].round(decimales),
+        name=tickers[0],
+        increasing_line_color="#00CC96",
+        decreasing_line_color="#EF553B",
+    ))
+    fig.update_layout(
+        title=f"{titulo}: {tickers[0]}",
+        xaxis_title="Fecha",
+        yaxis_title="Precio ($)",
+        xaxis_rangeslider_visible=True,
+        template="plotly_white",
+    )
+
+    div_id = "velas"
+    opciones = "".join(f'<option value="{html.escape(t)}">{html.escape(t)}</option>' for t in tickers)
+    selector = f'<select id="{div_id}-selector">{opciones}</select>'
+
+    # Rutas de los datos relativas al HTML, para que la carpeta pueda moverse junto a él
+    base = os.path.dirname(os.path.abspath(ruta_html))
+    ficheros = {str(t): os.path.relpath(os.path.abspath(r), base).replace(os.sep, "/") for t, r in rutas.items()}
+    script = _PLANTILLA_JS % {
+        "div_id": json.dumps(div_id),
+        "ficheros": json.dumps(ficheros),
+        "titulo": json.dumps(titulo),
+    }
+
+    # Misma copia local de plotly.min.js que el grid (escribir_html), para que la página funcione sin conexión
+    cuerpo = fig.to_html(full_html=False, include_plotlyjs="directory", div_id=div_id)
+    with open(ruta_html, "w", encoding="utf-8") as f:
+        f.write(f"<html><head><meta charset=\"utf-8\" /></head><body>{selector}{cuerpo}{script}</body></html>")
+
+    ruta_plotlyjs = os.path.join(base, "plotly.min.js")
+    if not os.path.exists(ruta_plotlyjs):
+        with open(ruta_plotlyjs, "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
@@ -0,0 +1,58 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+########################################
+
+# Columnas de presentación por defecto: {columna nueva: (columna de origen, formato)}
+FORMATOS_PRESENTACION = {"Fecha": ("Date", "%Y-%m-%d")}
+
+
+def formatear_unicos(serie, formato):
+    """
+    Formatea una columna como texto aplicando el formato solo a sus valores distintos.
+
+    Las fechas de un histórico se repiten en todos los tickers, así que se factoriza la columna,
+    se formatean los valores únicos de forma vectorizada y el resultado se guarda como categórica
+    (un código por fila y cada texto una sola vez en memoria).
+
+    :param serie: pd.Series de fechas o números.
+    :param formato: Formato strftime para fechas (por ejemplo '%Y-%m-%d') o de str.format para
+        números (por ejemplo '{:,.2f}').
+    :return: pd.Series categórica con el mismo índice que serie.
+    """
+    codigos, unicos = pd.factorize(serie, sort=True)
+    if isinstance(unicos, pd.DatetimeIndex):
+        textos = unicos.strftime(formato)
+    else:
+        textos = pd.Index(unicos).map(formato.format)
+    # Dos valores distintos pueden dar el mismo texto (p. ej. horas de un mismo día)
+    etiquetas, categorias = pd.factorize(textos)
+    # Los nulos (código -1) se mantienen como NaN en la categórica
+    codigos = np.where(codigos >= 0, etiquetas[codigos], -1)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=categorias), index=serie.index, name=serie.name)
+
+
+def agregar_columnas_presentacion(df, formatos=None):
+    """
+    Añade al DataFrame las columnas de texto que muestran las figuras (fechas, importes...).
+
+    Cada texto se calcula una sola vez para todo el DataFrame; las figuras las usan como
+    customdata en lugar de volver a formatear cada porción con strftime.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy.
+        formatos (dict, opcional): {columna nueva: (columna de origen, formato)}. Por defecto
+            FORMATOS_PRESENTACION (Fecha como 'AAAA-MM-DD').
+
+    Retorna:
+        pd.DataFrame: Copia de df con las columnas de presentación añadidas.
+
+    Ejemplo de uso:
+        df = agregar_columnas_presentacion(df, {'Fecha': ('Date', '%d/%m/%Y')})
+    """
+    formatos = formatos if formatos is not None else FORMATOS_PRESENTACION
+    faltantes = {origen for origen, _ in formatos.values()} - set(df.columns)
+    if faltantes:
+        raise KeyError(f"Columnas no encontradas en el DataFrame: {faltantes}")
+    return df.assign(**{nueva: formatear_unicos(df[origen], formato) for nueva, (origen, formato) in formatos.items()})
@@ -0,0 +1,144 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+########################################
+
+# Frecuencias candidatas (de más fina a más gruesa) y su duración aproximada en días.
+# Las semanas empiezan en lunes para que todas las velas se etiqueten con el inicio de su periodo.
+FRECUENCIAS = [("D", 1), ("W-MON", 7), ("MS", 30.44), ("QS", 91.31), ("YS", 365.25)]
+
+# Agregación OHLCV de cada bucket
+AGREGACION_OHLCV = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def elegir_frecuencia(fecha_inicio, fecha_fin, barras_objetivo, sesiones_por_ticker=None):
+    """
+    Elige la frecuencia más fina cuyo número de barras en el rango visible no supera el objetivo.
+
+    :param fecha_inicio: Primera fecha del rango visible.
+    :param fecha_fin: Última fecha del rango visible.
+    :param barras_objetivo: Número máximo de barras por ticker.
+    :param sesiones_por_ticker: Días con datos por ticker, si se conocen (evita contar festivos
+        y fines de semana como barras diarias).
+    :return: Alias de frecuencia de pandas ('D', 'W-MON', 'MS', 'QS' o 'YS').
+    """
+    dias = max((pd.Timestamp(fecha_fin).normalize() - pd.Timestamp(fecha_inicio).normalize()).days + 1, 1)
+
+    for frecuencia, duracion in FRECUENCIAS:
+        if frecuencia == "D" and sesiones_por_ticker is not None:
+            barras = sesiones_por_ticker
+        else:
+            barras = dias / duracion
+        if barras <= barras_objetivo:
+            return frecuencia
+    return FRECUENCIAS[-1][0]
+
+
+def resample_ohlcv(df, barras_objetivo=500, frecuencia=None, fecha_inicio=None, fecha_fin=None):
+    """
+    Agrega el DataFrame tidy a velas diarias, semanales, mensuales... de forma que cada ticker
+    tenga como mucho barras_objetivo velas en el rango visible.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame tidy con Date, Ticker, Open, High, Low, Close y Volume.
+        barras_objetivo (int, opcional): Número máximo de velas por ticker.
+        frecuencia (str, opcional): Fuerza una frecuencia de pandas; si es None se elige de forma adaptativa.
+        fecha_inicio (str o Timestamp, opcional): Inicio del rango visible (incluido).
+        fecha_fin (str o Timestamp, opcional): Fin del rango visible (incluido).
+
+    Retorna:
+        pd.DataFrame: DataFrame tidy agregado, ordenado por Ticker y Date.
+
+    Ejemplo de uso:
+        df_velas = resample_ohlcv(df, barras_objetivo=300)
+    """
+    if fecha_inicio is not None:
+        df = df[df["Date"] >= pd.Timestamp(fecha_inicio)]
+    if fecha_fin is not None:
+        df = df[df["Date"] <= pd.Timestamp(fecha_fin)]
+    if df.empty:
+        return df
+
+    # Datos ya diarios (sin hora): las velas diarias son las propias filas
+    dias = df["Date"].dt.normalize()
+    diario = bool((df["Date"] == dias).all())
+
+    if frecuencia is None:
+        sesiones_por_ticker = dias.groupby(df["Ticker"], observed=True).nunique().max()
+        frecuencia = elegir_frecuencia(df["Date"].min(), df["Date"].max(), barras_objetivo, sesiones_por_ticker)
+
+    if frecuencia == "D" and diario:
+        return df.sort_values(["Ticker", "Date"]).reset_index(drop=True)
+
+    agregado = (
+        df.groupby(["Ticker", pd.Grouper(key="Date", freq=frecuencia, closed="left", label="left")], observed=True)
+        .agg(AGREGACION_OHLCV)
+        .dropna(subset=["Open"])
+        .reset_index()
+    )
+    return agregado[df.columns.intersection(agregado.columns)]
+
+
+def lttb(x, y, n_puntos):
+    """
+    Largest Triangle Three Buckets: selecciona n_puntos de la serie (x, y) conservando su forma visual.
+
+    :param x: Array de valores del eje x (numérico o datetime64), ordenado.
+    :param y: Array de valores del eje y.
+    :param n_puntos: Número de puntos a conservar (incluye el primero y el último).
+    :return: Array de índices de los puntos seleccionados.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype("int64")
+    x = x.astype("float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+
+    if n_puntos >= n or n_puntos < 3:
+        return np.arange(n)
+
+    # Buckets intermedios (el primer y el último punto se conservan siempre)
+    limites = np.linspace(1, n - 1, n_puntos - 1).astype(int)
+    indices = np.empty(n_puntos, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(n_puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        # Punto medio del bucket siguiente
+        siguiente_fin = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fin:siguiente_fin].mean()
+        media_y = y[fin:siguiente_fin].mean()
+
+        # Área del triángulo (anterior, candidato, media del siguiente bucket)
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def decimar_lttb(df, columna_x, columna_y, n_puntos, por="Ticker"):
+    """
+    Aplica LTTB a cada grupo del DataFrame (por defecto, a cada ticker) para trazar líneas ligeras.
+
+    :param df: DataFrame de pandas.
+    :param columna_x: Columna del eje x (por ejemplo 'Date').
+    :param columna_y: Columna del eje y (por ejemplo 'Close').
+    :param n_puntos: Número de puntos a conservar por grupo.
+    :param por: Columna de agrupación, o None para tratar todo el DataFrame como una serie.
+    :return: DataFrame con las filas seleccionadas.
+    """
+    if por is None:
+        ordenado = df.sort_values(columna_x)
+        return ordenado.iloc[lttb(ordenado[columna_x], ordenado[columna_y], n_puntos)]
+
+    partes = []
+    for _, grupo in df.groupby(por, observed=True, sort=False):
+        grupo = grupo.sort_values(columna_x)
+        partes.append(grupo.iloc[lttb(grupo[columna_x], grupo[columna_y], n_puntos)])
+    return pd.concat(partes) if partes else df.iloc[0:0]
@@ -0,0 +1,244 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+########################################
+
+
+def _normalizar_numericos(serie):
+    """
+    Pasa los enteros y decimales (también los nullable) a float64, para que el mismo valor tenga
+    el mismo hash aunque un chunk lo lea como int64 y otro como float64 (por ejemplo, read_csv
+    convierte a float los chunks con algún NaN). Los enteros por encima de 2**53 pueden compartir
+    hash con su vecino, lo que solo añade colisiones.
+    """
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        # + 0.0 iguala -0.0 y 0.0
+        return serie.astype("float64") + 0.0
+    return serie
+
+
+def hash_valores(valores):
+    """
+    Calcula un hash de 64 bits por valor, estable entre chunks y procesos.
+
+    El hash no depende del tipo numérico: 3, 3.0 y un Int64 con valor 3 dan el mismo hash.
+
+    :param valores: pd.Series, pd.DataFrame (hash por fila) o array.
+    :return: Array uint64.
+    """
+    if not isinstance(valores, (pd.Series, pd.DataFrame)):
+        valores = pd.Series(valores)
+    if isinstance(valores, pd.DataFrame):
+        # Por posición: los nombres de columna no intervienen en el hash
+        valores = pd.DataFrame({i: _normalizar_numericos(valores.iloc[:, i]) for i in range(valores.shape[1])})
+    else:
+        valores = _normalizar_numericos(valores)
+    return pd.util.hash_pandas_object(valores, index=False).to_numpy(dtype="uint64")
+
+
+def _ceros_iniciales(x, bits=64):
+    """Número de ceros iniciales de cada entero uint64 (vectorizado, exacto)."""
+    x = x.astype("uint64", copy=True)
+    ceros = np.zeros(len(x), dtype="int64")
+    for desplazamiento in (32, 16, 8, 4, 2, 1):
+        sin_bits_altos = (x >> np.uint64(bits - desplazamiento)) == 0
+        ceros += np.where(sin_bits_altos, desplazamiento, 0)
+        x = np.where(sin_bits_altos, x << np.uint64(desplazamiento), x)
+    ceros += (x >> np.uint64(bits - 1)) == 0
+    return ceros
+
+
+class HyperLogLog:
+    """
+    Estimador de número de valores únicos con memoria constante (2**precision registros de un byte).
+
+    Dos sketches con la misma precisión se combinan tomando el máximo registro a registro.
+    Error relativo típico: 1.04 / sqrt(2**precision) (~0,8 % con precision=14). Mientras haya
+    pocos valores distintos (hasta 2**precision) se guardan sus hashes y el conteo es exacto.
+    """
+
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError("La precisión de HyperLogLog debe estar entre 4 y 18.")
+        self.precision = precision
+        self.registros = np.zeros(2 ** precision, dtype="uint8")
+        self.exactos = np.empty(0, dtype="uint64")
+
+    def actualizar_hashes(self, hashes):
+        """Incorpora un array de hashes uint64."""
+        if len(hashes) == 0:
+            return self
+        if self.exactos is not None:
+            self.exactos = np.union1d(self.exactos, hashes)
+            if len(self.exactos) > len(self.registros):
+                self.exactos = None
+        p = np.uint64(self.precision)
+        indices = (hashes >> (np.uint64(64) - p)).astype("int64")
+        resto = hashes << p
+        rangos = np.minimum(_ceros_iniciales(resto) + 1, 64 - self.precision + 1).astype("uint8")
+        np.maximum.at(self.registros, indices, rangos)
+        return self
+
+    def actualizar(self, valores):
+        """Incorpora los valores no nulos de una Serie o array."""
+        valores = pd.Series(valores).dropna()
+        return self.actualizar_hashes(hash_valores(valores))
+
+    def combinar(self, otro):
+        if otro.precision != self.precision:
+            raise ValueError("Solo se pueden combinar sketches HyperLogLog con la misma precisión.")
+        np.maximum(self.registros, otro.registros, out=self.registros)
+        if self.exactos is not None and otro.exactos is not None:
+            self.exactos = np.union1d(self.exactos, otro.exactos)
+            if len(self.exactos) > len(self.registros):
+                self.exactos = None
+        else:
+            self.exactos = None
+        return self
+
+    def estimar(self):
+        if self.exactos is not None:
+            return len(self.exactos)
+        m = len(self.registros)
+        alfa = 0.7213 / (1 + 1.079 / m)
+        estimacion = alfa * m * m / np.sum(np.ldexp(1.0, -self.registros.astype("int64")))
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimacion <= 2.5 * m and vacios > 0:
+            # Corrección para cardinalidades pequeñas (linear counting)
+            estimacion = m * np.log(m / vacios)
+        return int(round(estimacion))
+
+
+class TDigest:
+    """
+    Sketch de cuantiles combinable (t-digest con compresión vectorizada).
+
+    Los valores se agrupan en centroides (media, peso) cuyo tamaño máximo depende del cuantil:
+    pequeños en las colas y grandes en el centro, de modo que los cuantiles extremos son precisos.
+    """
+
+    def __init__(self, compresion=200):
+        self.compresion = compresion
+        self.medias = np.empty(0)
+        self.pesos = np.empty(0)
+        self.minimo = np.inf
+        self.maximo = -np.inf
+
+    @property
+    def total(self):
+        return float(self.pesos.sum())
+
+    def _comprimir(self, medias, pesos):
+        orden = np.argsort(medias, kind="stable")
+        medias, pesos = medias[orden], pesos[orden]
+        acumulado = np.cumsum(pesos)
+        total = acumulado[-1]
+        # Escala k1: k(q) = δ / (2π) · asin(2q - 1); cada centroide ocupa como mucho una unidad de k
+        q = (acumulado - pesos / 2) / total
+        k = self.compresion / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        grupos = np.floor(k - k.min()).astype("int64")
+        _, grupos = np.unique(grupos, return_inverse=True)
+        peso_grupo = np.bincount(grupos, weights=pesos)
+        media_grupo = np.bincount(grupos, weights=medias * pesos) / peso_grupo
+        self.medias, self.pesos = media_grupo, peso_grupo
+
+    def actualizar(self, valores):
+        """Incorpora los valores numéricos no nulos de una Serie o array."""
+        valores = np.asarray(pd.Series(valores).dropna(), dtype="float64")
+        if len(valores) == 0:
+            return self
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self._comprimir(np.concatenate([self.medias, valores]),
+                        np.concatenate([self.pesos, np.ones(len(valores))]))
+        return self
+
+    def combinar(self, otro):
+        if len(otro.pesos) == 0:
+            return self
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        self._comprimir(np.concatenate([self.medias, otro.medias]), np.concatenate([self.pesos, otro.pesos]))
+        return self
+
+    def cuantil(self, q):
+        """
+        Estima uno o varios cuantiles (entre 0 y 1).
+
+        :return: float o array, NaN si el sketch está vacío.
+        """
+        if len(self.pesos) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        total = self.total
+        centros = np.cumsum(self.pesos) - self.pesos / 2
+        posiciones = np.concatenate([[0.0], centros, [total]])
+        valores = np.concatenate([[self.minimo], self.medias, [self.maximo]])
+        return np.interp(np.asarray(q, dtype="float64") * total, posiciones, valores)
+
+
+def mascara_duplicados(df, columnas=None):
+    """
+    Marca todas las filas repetidas (equivalente a df.duplicated(subset=columnas, keep=False)).
+
+    Primero se calcula un hash de 64 bits por fila y solo las filas con hash repetido se comparan
+    de forma exacta, en lugar de factorizar todas las columnas de todo el DataFrame.
+
+    :param df: DataFrame de pandas.
+    :param columnas: Columnas que definen la clave. Por defecto, todas.
+    :return: Array booleano con True en las filas duplicadas.
+    """
+    datos = df if columnas is None else df[list(columnas)]
+    hashes = pd.Series(hash_valores(datos))
+    candidatas = np.flatnonzero(hashes.duplicated(keep=False).to_numpy())
+
+    mascara = np.zeros(len(df), dtype=bool)
+    if len(candidatas):
+        # Confirmación exacta (descarta colisiones de hash)
+        mascara[candidatas] = datos.iloc[candidatas].duplicated(keep=False).to_numpy()
+    return mascara
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre hashes de 64 bits: pertenencia aproximada con memoria fija.
+
+    Nunca da falsos negativos; la tasa de falsos positivos se aproxima a tasa_error mientras no se
+    superen `capacidad` elementos. Dos filtros con los mismos parámetros se combinan con un OR.
+    """
+
+    def __init__(self, capacidad, tasa_error=0.01):
+        self.n_bits = max(8, int(np.ceil(-capacidad * np.log(tasa_error) / np.log(2) ** 2)))
+        self.n_hashes = max(1, int(round(self.n_bits / capacidad * np.log(2))))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype="uint8")
+
+    def _posiciones(self, hashes):
+        # Doble hashing: h_i = h1 + i * h2 (Kirsch-Mitzenmacher)
+        h1 = (hashes & np.uint64(0xFFFFFFFF)).astype("uint64")
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.n_hashes, dtype="uint64")
+        return ((h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.n_bits)).astype("int64")
+
+    def actualizar_hashes(self, hashes):
+        posiciones = self._posiciones(hashes).ravel()
+        np.bitwise_or.at(self.bits, posiciones >> 3, (1 << (posiciones & 7)).astype("uint8"))
+        return self
+
+    def actualizar(self, valores):
+        """Incorpora los valores no nulos de una Serie o array."""
+        return self.actualizar_hashes(hash_valores(pd.Series(valores).dropna()))
+
+    def contiene_hashes(self, hashes):
+        posiciones = self._posiciones(hashes)
+        presentes = (self.bits[posiciones >> 3] >> (posiciones & 7)) & 1
+        return presentes.all(axis=1)
+
+    def contiene(self, valores):
+        """Array booleano: True si el valor posiblemente está en el filtro, False si seguro que no."""
+        return self.contiene_hashes(hash_valores(pd.Series(valores)))
+
+    def combinar(self, otro):
+        if (otro.n_bits, otro.n_hashes) != (self.n_bits, self.n_hashes):
+            raise ValueError("Solo se pueden combinar filtros de Bloom con los mismos parámetros.")
+        np.bitwise_or(self.bits, otro.bits, out=self.bits)
+        return self
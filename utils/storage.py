@@ -0,0 +1,242 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from utils.sketches import mascara_duplicados
+########################################
+
+# Esquema tidy de las cotizaciones diarias
+COLUMNAS_OHLCV = ["Date", "Ticker", "Open", "High", "Low", "Close", "Volume"]
+
+# Columnas de partición (Hive: Ticker=AAPL/Year=2024/...)
+PARTICIONES = ["Ticker", "Year"]
+
+# Formatos soportados: 'parquet' (comprimido) o 'arrow' (IPC sin comprimir, mapeable en memoria)
+FORMATOS = {"parquet": "parquet", "arrow": "ipc"}
+
+
+def _esquema_particiones():
+    return ds.partitioning(
+        pa.schema([("Ticker", pa.string()), ("Year", pa.int16())]),
+        flavor="hive",
+    )
+
+
+def _formato(formato):
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' no soportado. Opciones: {list(FORMATOS)}")
+    return FORMATOS[formato]
+
+
+def guardar_dataset(df, ruta_base, formato="parquet", filas_por_grupo=64_000):
+    """
+    Guarda el DataFrame tidy de cotizaciones en un almacén columnar particionado por ticker y año.
+
+    Los tipos de datos (datetime64, float, int) se conservan en el fichero, por lo que no es
+    necesario volver a parsear texto ni llamar a pd.to_datetime al cargar. Las particiones
+    presentes en df se sobrescriben; el resto del almacén no se modifica.
+
+    Parámetros:
+        df (pd.DataFrame): DataFrame con las columnas Date, Ticker, Open, High, Low, Close y Volume.
+        ruta_base (str): Directorio raíz del almacén.
+        formato (str, opcional): 'parquet' o 'arrow'. Por defecto 'parquet'.
+        filas_por_grupo (int, opcional): Tamaño máximo de cada row group.
+
+    Ejemplo de uso:
+        guardar_dataset(df, 'Data/acciones')
+    """
+    faltantes = set(COLUMNAS_OHLCV) - set(df.columns)
+    if faltantes:
+        raise KeyError(f"Columnas no encontradas en el DataFrame: {faltantes}")
+
+    datos = df[COLUMNAS_OHLCV].assign(
+        Ticker=df["Ticker"].astype(str),
+        Year=df["Date"].dt.year.astype("int16"),
+    )
+    tabla = pa.Table.from_pandas(datos, preserve_index=False)
+
+    os.makedirs(ruta_base, exist_ok=True)
+    ds.write_dataset(
+        tabla,
+        ruta_base,
+        format=_formato(formato),
+        partitioning=_esquema_particiones(),
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=filas_por_grupo,
+        min_rows_per_group=min(filas_por_grupo, 1024),
+        basename_template="part-{i}." + ("parquet" if formato == "parquet" else "arrow"),
+    )
+
+
+def abrir_dataset(ruta_base, formato="parquet"):
+    """
+    Abre el almacén particionado sin leer datos. Con formato 'arrow' los ficheros se mapean en memoria.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :param formato: 'parquet' o 'arrow'.
+    :return: pyarrow.dataset.Dataset
+    """
+    if not os.path.isdir(ruta_base):
+        raise FileNotFoundError(f"No existe el almacén de datos: {ruta_base}")
+    return ds.dataset(
+        ruta_base,
+        format=_formato(formato),
+        partitioning=_esquema_particiones(),
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def _filtro(tickers=None, fecha_inicio=None, fecha_fin=None):
+    condiciones = []
+    if tickers is not None:
+        condiciones.append(ds.field("Ticker").isin([str(t) for t in tickers]))
+    if fecha_inicio is not None:
+        inicio = pd.Timestamp(fecha_inicio)
+        # El filtro por año poda particiones completas antes de mirar los row groups
+        condiciones.append(ds.field("Year") >= inicio.year)
+        condiciones.append(ds.field("Date") >= inicio)
+    if fecha_fin is not None:
+        fin = pd.Timestamp(fecha_fin)
+        condiciones.append(ds.field("Year") <= fin.year)
+        condiciones.append(ds.field("Date") < fin)
+
+    if not condiciones:
+        return None
+    filtro = condiciones[0]
+    for condicion in condiciones[1:]:
+        filtro = filtro & condicion
+    return filtro
+
+
+def cargar_dataset(ruta_base, columnas=None, tickers=None, fecha_inicio=None, fecha_fin=None, formato="parquet"):
+    """
+    Carga el almacén columnar leyendo solo las columnas, particiones y row groups necesarios.
+
+    Parámetros:
+        ruta_base (str): Directorio raíz del almacén.
+        columnas (list, opcional): Columnas a cargar. Por defecto todas las del esquema OHLCV.
+        tickers (list, opcional): Tickers a cargar. Por defecto todos.
+        fecha_inicio (str o Timestamp, opcional): Fecha mínima (incluida).
+        fecha_fin (str o Timestamp, opcional): Fecha máxima (excluida).
+        formato (str, opcional): 'parquet' o 'arrow'.
+
+    Retorna:
+        pd.DataFrame: Datos ordenados por Ticker y Date, con los tipos originales.
+
+    Ejemplo de uso:
+        df = cargar_dataset('Data/acciones', columnas=['Date', 'Ticker', 'Close'], tickers=['AAPL'])
+    """
+    columnas = list(columnas) if columnas is not None else list(COLUMNAS_OHLCV)
+    desconocidas = set(columnas) - set(COLUMNAS_OHLCV) - {"Year"}
+    if desconocidas:
+        raise KeyError(f"Columnas no encontradas en el almacén: {desconocidas}")
+
+    dataset = abrir_dataset(ruta_base, formato=formato)
+    tabla = dataset.to_table(columns=columnas, filter=_filtro(tickers, fecha_inicio, fecha_fin))
+
+    orden = [(c, "ascending") for c in ("Ticker", "Date") if c in columnas]
+    if orden:
+        tabla = tabla.sort_by(orden)
+
+    # split_blocks evita consolidar columnas en bloques 2D (sin copias adicionales)
+    return tabla.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _marca_fragmento(fragmento):
+    """
+    Última fecha y número de filas de un fichero del almacén.
+
+    Ambos valores salen de los metadatos del pie del fichero Parquet (filas y estadística máxima
+    de Date de cada row group), sin leer datos. Si faltan las estadísticas, se lee solo la
+    columna Date del fichero.
+    """
+    metadatos = fragmento.metadata
+    columna = metadatos.schema.to_arrow_schema().get_field_index("Date")
+    maximos = []
+    for i in range(metadatos.num_row_groups):
+        estadisticas = metadatos.row_group(i).column(columna).statistics
+        if estadisticas is None or not estadisticas.has_min_max:
+            break
+        maximos.append(pd.Timestamp(estadisticas.max))
+    else:
+        return (max(maximos) if maximos else pd.NaT), metadatos.num_rows
+
+    fechas = fragmento.to_table(columns=["Date"]).column("Date")
+    return pd.Timestamp(pc.max(fechas).as_py()), len(fechas)
+
+
+def marcas_particiones(ruta_base, formato="parquet"):
+    """
+    Calcula la marca de agua de cada partición (Ticker, Year) del almacén: última fecha y número de filas.
+
+    En Parquet no se leen datos: la partición sale de la ruta de cada fichero y la fecha máxima
+    y el número de filas, de sus metadatos (ver _marca_fragmento), así que el coste depende del
+    número de ficheros y no del de filas. En 'arrow' se agrega la columna Date.
+
+    Sirve para saber si un índice derivado del almacén (por ejemplo, el de utils.aggregates)
+    refleja su contenido actual.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :param formato: 'parquet' o 'arrow'.
+    :return: DataFrame con las columnas Ticker, Year, Max y Filas, ordenado por Ticker y Year.
+    """
+    dataset = abrir_dataset(ruta_base, formato=formato)
+    if formato != "parquet":
+        # Los ficheros Arrow no guardan estadísticas: se agrega la columna Date (mapeada en memoria)
+        tabla = dataset.to_table(columns=["Ticker", "Year", "Date"])
+        marcas = tabla.group_by(["Ticker", "Year"]).aggregate([("Date", "max"), ("Date", "count")]).to_pandas()
+        marcas = marcas.rename(columns={"Date_max": "Max", "Date_count": "Filas"})
+        return marcas[["Ticker", "Year", "Max", "Filas"]].sort_values(["Ticker", "Year"]).reset_index(drop=True)
+
+    filas = []
+    for fragmento in dataset.get_fragments():
+        claves = ds.get_partition_keys(fragmento.partition_expression)
+        maximo, n_filas = _marca_fragmento(fragmento)
+        filas.append((claves["Ticker"], claves["Year"], maximo, n_filas))
+
+    marcas = pd.DataFrame(filas, columns=["Ticker", "Year", "Max", "Filas"])
+    marcas = marcas[marcas["Filas"] > 0].groupby(["Ticker", "Year"], as_index=False).agg({"Max": "max", "Filas": "sum"})
+    return marcas[["Ticker", "Year", "Max", "Filas"]].sort_values(["Ticker", "Year"]).reset_index(drop=True)
+
+
+def duplicados_almacen(ruta_base, claves=("Date", "Ticker"), formato="parquet"):
+    """
+    Busca claves duplicadas en el almacén recorriéndolo partición a partición.
+
+    Como Date determina Year, dos filas con la misma (Date, Ticker) caen siempre en la misma
+    partición (Ticker, Year): basta con leer las columnas clave de cada partición por separado,
+    de modo que la memoria depende de la partición más grande y no del almacén completo.
+
+    :param ruta_base: Directorio raíz del almacén.
+    :param claves: Columnas que identifican una fila. Deben incluir Date y Ticker.
+    :param formato: 'parquet' o 'arrow'.
+    :return: DataFrame con las claves duplicadas y el número de apariciones ('Count').
+    """
+    claves = list(claves)
+    if not {"Date", "Ticker"} <= set(claves):
+        raise ValueError("Las claves deben incluir 'Date' y 'Ticker' para recorrer el almacén por particiones.")
+
+    dataset = abrir_dataset(ruta_base, formato=formato)
+    particiones = {}
+    for fragmento in dataset.get_fragments():
+        particiones.setdefault(str(fragmento.partition_expression), []).append(fragmento)
+
+    resultados = []
+    for fragmentos in particiones.values():
+        tabla = pa.concat_tables([
+            f.to_table(columns=claves, schema=dataset.schema) for f in fragmentos
+        ])
+        df = tabla.to_pandas()
+        duplicadas = df[mascara_duplicados(df, claves)]
+        if not duplicadas.empty:
+            resultados.append(duplicadas.groupby(claves, observed=True).size().rename("Count").reset_index())
+
+    if not resultados:
+        return pd.DataFrame(columns=claves + ["Count"])
+    return pd.concat(resultados, ignore_index=True).sort_values(claves).reset_index(drop=True)
@@ -0,0 +1,264 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import hashlib
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+########################################
+
+# openpyxl avisa con UserWarning de estilos o validaciones que no sabe leer; solo se silencian
+# sus avisos, y solo cuando se usan las funciones de Excel
+warnings.filterwarnings(action='ignore', category=UserWarning, module='openpyxl')
+
+
+def get_excel_sheet_names(excel_path):
+    """
+    Retorna una lista con los nombres de las hojas en un archivo Excel.
+    """
+    try:
+        with pd.ExcelFile(excel_path) as xls:
+            return xls.sheet_names
+    except Exception as e:
+        print(f"Error al obtener los nombres de las hojas: {e}")
+        return []
+
+def _cache_excel(cache_dir, path):
+    """
+    Carpeta de caché de un libro (una por ruta) y versión actual del libro (fecha de modificación y tamaño).
+    """
+    info = os.stat(path)
+    carpeta = os.path.join(cache_dir, hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest())
+    return carpeta, f"{info.st_mtime_ns}-{info.st_size}"
+
+
+def _ruta_cache_hoja(carpeta, version, hoja, columnas):
+    """Fichero de caché de una hoja y unas columnas en una versión del libro."""
+    clave = hashlib.sha1(f"{hoja}|{columnas}".encode("utf-8")).hexdigest()
+    return os.path.join(carpeta, f"{version}_{clave}.parquet")
+
+
+def _ruta_cache_hojas(carpeta, version):
+    """Fichero de caché con la lista de hojas de una versión del libro."""
+    return os.path.join(carpeta, f"{version}_hojas.json")
+
+
+def _podar_cache_excel(carpeta, version):
+    """Elimina las entradas de versiones anteriores del libro."""
+    for nombre in os.listdir(carpeta):
+        if not nombre.startswith(version + "_"):
+            os.remove(os.path.join(carpeta, nombre))
+
+
+def _abrir_excel(path):
+    try:
+        return pd.ExcelFile(path)
+    except Exception as e:
+        raise FileNotFoundError(f"No se pudieron leer hojas del archivo: {path}") from e
+
+
+def _leer_hoja_excel(path, hoja, columnas):
+    # Usado por el pool de procesos: cada proceso abre el libro y parsea solo su hoja
+    return pd.read_excel(path, sheet_name=hoja, usecols=columnas)
+
+
+def load_excel_sheets(path, sheet_name=None, columnas=None, n_procesos=None, cache_dir=None):
+    """
+    Carga hojas de un archivo Excel en DataFrames.
+
+    El libro se abre una única vez y solo se parsean las hojas y columnas solicitadas. Con
+    n_procesos > 1 las hojas se parsean en paralelo (cada proceso abre el libro y lee su hoja).
+    Con cache_dir, la lista de hojas y cada hoja parseada se guardan (en JSON y Parquet) y se
+    reutilizan mientras el archivo no cambie (misma ruta, fecha de modificación y tamaño): si todo
+    está en caché, el libro no se abre. Al guardar, se eliminan las entradas de versiones
+    anteriores del mismo archivo.
+
+    Parámetros:
+        path (str): Ruta del archivo Excel.
+        sheet_name (str o list, opcional): Nombre de la hoja (o lista de hojas) a cargar. 
+                                     Si no se indica, carga todas las hojas.
+        columnas (list o str, opcional): Columnas a leer (argumento usecols de pd.read_excel).
+        n_procesos (int, opcional): Procesos para parsear varias hojas en paralelo.
+        cache_dir (str, opcional): Carpeta de la caché.
+
+    Retorna:
+        dict o DataFrame: 
+            - Si sheet_name es None o una lista, retorna un diccionario {hoja: DataFrame}.
+            - Si se especifica sheet_name como str, retorna directamente el DataFrame de esa hoja.
+    """
+    hojas = carpeta = version = xls = None
+    if cache_dir:
+        try:
+            carpeta, version = _cache_excel(cache_dir, path)
+        except OSError as e:
+            raise FileNotFoundError(f"No se pudieron leer hojas del archivo: {path}") from e
+        if os.path.exists(_ruta_cache_hojas(carpeta, version)):
+            with open(_ruta_cache_hojas(carpeta, version), encoding="utf-8") as f:
+                hojas = json.load(f)
+
+    try:
+        hojas_en_cache = hojas is not None
+        if not hojas_en_cache:
+            xls = _abrir_excel(path)
+            hojas = xls.sheet_names
+        if not hojas:
+            raise FileNotFoundError(f"No se pudieron leer hojas del archivo: {path}")
+
+        solicitadas = hojas if not sheet_name else ([sheet_name] if isinstance(sheet_name, str) else list(sheet_name))
+        for hoja in solicitadas:
+            if hoja not in hojas:
+                raise ValueError(f"La hoja '{hoja}' no existe en el archivo. Hojas disponibles: {hojas}")
+
+        dfs, pendientes = {}, []
+        for hoja in solicitadas:
+            ruta_cache = _ruta_cache_hoja(carpeta, version, hoja, columnas) if cache_dir else None
+            if ruta_cache and os.path.exists(ruta_cache):
+                dfs[hoja] = pd.read_parquet(ruta_cache)
+            else:
+                pendientes.append(hoja)
+
+        if n_procesos and n_procesos > 1 and len(pendientes) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_procesos, len(pendientes))) as pool:
+                leidas = pool.map(_leer_hoja_excel, [path] * len(pendientes), pendientes,
+                                  [columnas] * len(pendientes))
+                dfs.update(zip(pendientes, leidas))
+        elif pendientes:
+            if xls is None:
+                xls = _abrir_excel(path)
+            for hoja in pendientes:
+                dfs[hoja] = xls.parse(hoja, usecols=columnas)
+    finally:
+        if xls is not None:
+            xls.close()
+
+    if cache_dir and (pendientes or not hojas_en_cache):
+        os.makedirs(carpeta, exist_ok=True)
+        _podar_cache_excel(carpeta, version)
+        with open(_ruta_cache_hojas(carpeta, version), "w", encoding="utf-8") as f:
+            json.dump(hojas, f)
+        for hoja in pendientes:
+            try:
+                dfs[hoja].to_parquet(_ruta_cache_hoja(carpeta, version, hoja, columnas))
+            except Exception as e:
+                # Columnas con tipos mezclados o cabeceras no textuales no se pueden guardar en Parquet
+                print(f"No se pudo guardar en caché la hoja '{hoja}': {e}")
+
+    dfs = {hoja: dfs[hoja] for hoja in solicitadas}
+    if isinstance(sheet_name, str):
+        return dfs[sheet_name]
+    return dfs
+
+
+
+def exportar_excel(file_path, sheets):
+    """
+    Exporta múltiples DataFrames a un archivo Excel, cada uno en su propia hoja.
+
+    Parámetros:
+        file_path (str): Ruta completa del archivo Excel a crear.
+        sheets (list de tuplas): Cada tupla debe contener ('nombre_hoja', DataFrame).
+                                 Ejemplo: [('Hoja1', df1), ('Hoja2', df2)]
+    Ejemplo de uso:
+        exportar_excel('ruta/del/archivo.xlsx', [('Hoja1', df1), ('Hoja2', df2)])
+
+    Para informes grandes, exportar_excel_streaming escribe por chunks con memoria constante.
+    """
+    if not sheets:
+        raise ValueError("No se han proporcionado hojas para exportar.")
+
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        for nombre_hoja, df in sheets:
+            if not isinstance(df, pd.DataFrame):
+                raise TypeError(f"El objeto para la hoja '{nombre_hoja}' no es un DataFrame.")
+            df.to_excel(writer, sheet_name=nombre_hoja, index=False)
+
+    print(f"Archivo '{file_path}' creado con {len(sheets)} hoja(s): {', '.join([n for n,_ in sheets])}.")
+
+
+# Límite de filas de una hoja de Excel (.xlsx), incluida la cabecera
+MAX_FILAS_EXCEL = 1_048_576
+
+
+def _nombre_hoja(nombre, parte):
+    # Los nombres de hoja de Excel tienen como máximo 31 caracteres
+    if parte == 0:
+        return str(nombre)[:31]
+    sufijo = f"_{parte + 1}"
+    return str(nombre)[:31 - len(sufijo)] + sufijo
+
+
+def exportar_excel_streaming(file_path, sheets, max_filas=MAX_FILAS_EXCEL):
+    """
+    Exporta hojas a Excel en streaming, sin construir el libro completo en memoria.
+
+    Usa el modo write_only de openpyxl: cada fila se serializa al disco al añadirse, por lo que la
+    memoria depende del tamaño del chunk y no del libro. Si una hoja supera el límite de filas de
+    Excel, continúa automáticamente en 'nombre_2', 'nombre_3', etc. (repitiendo la cabecera).
+
+    Parámetros:
+        file_path (str): Ruta completa del archivo Excel a crear.
+        sheets (iterable de tuplas): ('nombre_hoja', chunks), donde chunks es un DataFrame o un
+                                     iterable de DataFrames con las mismas columnas.
+        max_filas (int, opcional): Filas por hoja, incluida la cabecera. Por defecto, el límite de Excel.
+
+    Retorna:
+        dict: {hoja: filas escritas}.
+
+    Ejemplo de uso:
+        chunks = (df_ticker for _, df_ticker in df.groupby('Ticker'))
+        exportar_excel_streaming('ruta/del/archivo.xlsx', [('OHLCV', chunks)])
+    """
+    from openpyxl import Workbook
+
+    if max_filas < 2:
+        raise ValueError("max_filas debe permitir al menos la cabecera y una fila de datos.")
+
+    inicio = time.perf_counter()
+    libro = Workbook(write_only=True)
+    filas_por_hoja = {}
+
+    for nombre_hoja, chunks in sheets:
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+        hoja, parte, filas_hoja, cabecera = None, 0, 0, None
+
+        for chunk in chunks:
+            if not isinstance(chunk, pd.DataFrame):
+                raise TypeError(f"El objeto para la hoja '{nombre_hoja}' no es un DataFrame.")
+            if cabecera is None:
+                cabecera = [str(col) for col in chunk.columns]
+            # Excel no admite NaN/NaT: se escriben como celdas vacías
+            valores = chunk.astype(object).where(chunk.notna(), None)
+
+            for fila in valores.itertuples(index=False, name=None):
+                if hoja is None or filas_hoja >= max_filas:
+                    if hoja is not None:
+                        parte += 1
+                    hoja = libro.create_sheet(_nombre_hoja(nombre_hoja, parte))
+                    hoja.append(cabecera)
+                    filas_hoja = 1
+                    filas_por_hoja[hoja.title] = 0
+                hoja.append(fila)
+                filas_hoja += 1
+                filas_por_hoja[hoja.title] += 1
+
+        if hoja is None:
+            # Hoja sin datos: se escribe solo la cabecera (si se conoce)
+            hoja = libro.create_sheet(_nombre_hoja(nombre_hoja, 0))
+            if cabecera:
+                hoja.append(cabecera)
+            filas_por_hoja[hoja.title] = 0
+
+    if not filas_por_hoja:
+        raise ValueError("No se han proporcionado hojas para exportar.")
+
+    libro.save(file_path)
+
+    segundos = time.perf_counter() - inicio
+    total = sum(filas_por_hoja.values())
+    print(f"Archivo '{file_path}' creado con {len(filas_por_hoja)} hoja(s): {', '.join(filas_por_hoja)}. "
+          f"{total} filas en {segundos:.1f} s ({total / segundos if segundos else 0:,.0f} filas/s).")
+    return filas_por_hoja
@@ -1,96 +1,41 @@
 ########################################
 #### LIBRERIAS NECESARIAS           ####
-import sys
-import os 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-import warnings
-warnings.simplefilter(action='ignore', category=UserWarning)
-
-import xlwings as xw
+import importlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+import numpy as np
 import pandas as pd
 from pandas._typing import MergeHow
-########################################
-
-def xlimport():
-    """
-    Importa los datos de la región actual de Excel como un DataFrame de pandas.
-    
-    :return: DataFrame con los datos importados desde Excel.
-    """
-    data = xw.books.active.app.selection.current_region.value # type: ignore
-    return pd.DataFrame(data[1:], columns=data[0]) # type: ignore
-
-def xlexport(df):
-    '''
-    Esta funcion exporta la el DataFrame 'df' a la celda activa de excel
-    
-    :param df: Dataframe de pandas.
-    '''
-    xw.books.active.app.selection.options(index=False).value = df # type: ignore
-
-
-def get_excel_sheet_names(excel_path):
-    """
-    Retorna una lista con los nombres de las hojas en un archivo Excel.
-    """
-    try:
-        with pd.ExcelFile(excel_path) as xls:
-            return xls.sheet_names
-    except Exception as e:
-        print(f"Error al obtener los nombres de las hojas: {e}")
-        return []
-
-def load_excel_sheets(path, sheet_name=None):
-    """
-    Carga hojas de un archivo Excel en DataFrames.
-
-    Parámetros:
-        path (str): Ruta del archivo Excel.
-        sheet_name (str, opcional): Nombre de la hoja a cargar. 
-                                     Si no se indica, carga todas las hojas.
 
-    Retorna:
-        dict o DataFrame: 
-            - Si sheet_name es None, retorna un diccionario {hoja: DataFrame}.
-            - Si se especifica sheet_name, retorna directamente el DataFrame de esa hoja.
-    """
-    hojas = get_excel_sheet_names(path)
-    if not hojas:
-        raise FileNotFoundError(f"No se pudieron leer hojas del archivo: {path}")
-
-    if sheet_name:
-        if sheet_name not in hojas:
-            raise ValueError(f"La hoja '{sheet_name}' no existe en el archivo. Hojas disponibles: {hojas}")
-        return pd.read_excel(path, sheet_name=sheet_name)
-    else:
-        dfs = {hoja: pd.read_excel(path, sheet_name=hoja) for hoja in hojas}
-        return dfs
+from utils.chunked_profile import PerfilStreaming
+from utils.sketches import BloomFilter, mascara_duplicados
+########################################
 
+# Funciones de Excel (utils.tidy_excel, openpyxl) y del puente con Excel (utils.xl_bridge, xlwings).
+# Se importan la primera vez que se usan, de modo que importar los helpers de pandas no carga
+# xlwings ni openpyxl (xlwings no se puede importar en Linux sin Excel).
+_SUBMODULOS = {
+    "xlimport": "utils.xl_bridge",
+    "xlexport": "utils.xl_bridge",
+    "get_excel_sheet_names": "utils.tidy_excel",
+    "load_excel_sheets": "utils.tidy_excel",
+    "exportar_excel": "utils.tidy_excel",
+    "exportar_excel_streaming": "utils.tidy_excel",
+    "MAX_FILAS_EXCEL": "utils.tidy_excel",
+}
 
 
-def exportar_excel(file_path, sheets):
-    """
-    Exporta múltiples DataFrames a un archivo Excel, cada uno en su propia hoja.
+def __getattr__(nombre):
+    if nombre in _SUBMODULOS:
+        valor = getattr(importlib.import_module(_SUBMODULOS[nombre]), nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
-    Parámetros:
-        file_path (str): Ruta completa del archivo Excel a crear.
-        sheets (list de tuplas): Cada tupla debe contener ('nombre_hoja', DataFrame).
-                                 Ejemplo: [('Hoja1', df1), ('Hoja2', df2)]
-    Ejemplo de uso:
-        exportar_excel('ruta/del/archivo.xlsx', [('Hoja1', df1), ('Hoja2', df2)])
-    """
-    if not sheets:
-        raise ValueError("No se han proporcionado hojas para exportar.")
 
-    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-        for nombre_hoja, df in sheets:
-            if not isinstance(df, pd.DataFrame):
-                raise TypeError(f"El objeto para la hoja '{nombre_hoja}' no es un DataFrame.")
-            df.to_excel(writer, sheet_name=nombre_hoja, index=False)
-
-    print(f"Archivo '{file_path}' creado con {len(sheets)} hoja(s): {', '.join([n for n,_ in sheets])}.")
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULOS))
 
 
 def describe_df(data):
@@ -138,7 +83,94 @@ def describe_df(data):
     return summary
 
 
-def resumir_metricas(df, niveles, columnas_metricas, metricas, orden=None, ascendente=True, incluir_total=False):
+def describe_df_chunked(chunks, compresion=200, precision_hll=14):
+    """
+    Versión en streaming de describe_df para datos que no caben en memoria.
+
+    Recorre un iterador de chunks (por ejemplo pd.read_csv(..., chunksize=...) o los lotes de un
+    dataset Parquet) una sola vez, acumulando estadísticos combinables. La mediana y los cuartiles
+    se estiman con t-digest y el número de valores únicos con HyperLogLog; el resto de columnas
+    son exactas.
+
+    :param chunks: Iterable de DataFrames con las mismas columnas.
+    :param compresion: Compresión del t-digest (mayor = cuantiles más precisos).
+    :param precision_hll: Precisión de HyperLogLog (2**precision registros).
+    :return: DataFrame con el mismo esquema que describe_df.
+
+    Ejemplo de uso:
+        describe_df_chunked(pd.read_csv('datos.csv', chunksize=1_000_000, parse_dates=['Date']))
+    """
+    perfil = PerfilStreaming(compresion=compresion, precision_hll=precision_hll)
+    for chunk in chunks:
+        perfil.actualizar(chunk)
+    return perfil.resumen()
+
+
+def _aplanar_columnas(resumen):
+    # Si se pasa una sola métrica por columna, los nombres de columnas son simples.
+    # Si hay múltiples, el resultado es un MultiIndex que se puede aplanar.
+    if isinstance(resumen.columns, pd.MultiIndex):
+        resumen.columns = ['_'.join(col).strip('_') for col in resumen.columns.values]
+    return resumen
+
+
+def _sumas_numericas(resumen, niveles):
+    columnas = [col for col in resumen.columns
+                if col not in niveles and pd.api.types.is_numeric_dtype(resumen[col])]
+    return resumen[columnas].sum()
+
+
+def _agregar_particion(particion, niveles, columnas_metricas, metricas):
+    """
+    Agrega una partición hash (todas las filas de cada grupo caen en la misma partición).
+
+    :return: Tupla (resumen de la partición, sumas parciales de sus columnas numéricas).
+    """
+    resumen = particion.groupby(niveles, dropna=False, observed=True)[columnas_metricas].agg(metricas).reset_index()
+    resumen = _aplanar_columnas(resumen)
+    return resumen, _sumas_numericas(resumen, niveles)
+
+
+def _resumir_paralelo(df, niveles, columnas_metricas, metricas, n_procesos, n_particiones):
+    """
+    Reparte las filas en particiones hash según las claves de agrupación y las agrega en un pool
+    de procesos. Cada grupo queda completo en una única partición, así que cualquier métrica
+    (incluida nunique) es exacta y los resultados parciales solo se concatenan.
+
+    Como mucho hay n_procesos particiones en vuelo, lo que acota la memoria adicional.
+
+    :return: Tupla (resumen, sumas de las columnas numéricas para la fila de total).
+    """
+    n_procesos = n_procesos or os.cpu_count() or 1
+    n_particiones = n_particiones or 4 * n_procesos
+    asignacion = pd.util.hash_pandas_object(df[niveles], index=False).to_numpy() % n_particiones
+    posiciones = pd.Series(np.arange(len(df))).groupby(asignacion).indices
+
+    partes, sumas = [], []
+    with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+        pendientes = iter(posiciones.values())
+        en_vuelo = set()
+        while True:
+            while len(en_vuelo) < n_procesos:
+                filas = next(pendientes, None)
+                if filas is None:
+                    break
+                en_vuelo.add(pool.submit(_agregar_particion, df.iloc[filas], niveles, columnas_metricas, metricas))
+            if not en_vuelo:
+                break
+            terminados, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                resumen_particion, sumas_particion = futuro.result()
+                partes.append(resumen_particion)
+                sumas.append(sumas_particion)
+
+    resumen = pd.concat(partes, ignore_index=True)
+    resumen = resumen.sort_values(by=niveles, na_position='last', kind='stable').reset_index(drop=True)
+    return resumen, pd.concat(sumas, axis=1).sum(axis=1)
+
+
+def resumir_metricas(df, niveles, columnas_metricas, metricas, orden=None, ascendente=True, incluir_total=False,
+                     motor='pandas', n_procesos=None, n_particiones=None):
     """
     Agrupa el DataFrame según los niveles dados, aplica métricas a columnas seleccionadas y permite ordenar el resultado.
 
@@ -150,6 +182,10 @@ def resumir_metricas(df, niveles, columnas_metricas, metricas, orden=None, ascen
         orden (str or list, optional): Columna(s) por las cuales ordenar el resultado.
         ascendente (bool or list, optional): Orden ascendente o descendente.
         incluir_total (bool, optional): Si True, añade una fila con el sumatorio de las columnas numéricas.
+        motor (str, optional): 'pandas' (un único groupby) o 'paralelo' (particiones hash de las claves
+                               agregadas en un pool de procesos). Por defecto 'pandas'.
+        n_procesos (int, optional): Procesos del pool con motor='paralelo'. Por defecto, os.cpu_count().
+        n_particiones (int, optional): Particiones hash con motor='paralelo'. Por defecto, 4 * n_procesos.
 
     Returns:
         pd.DataFrame: DataFrame con métricas agregadas, ordenado si se especifica, y fila de total si se solicita.
@@ -161,61 +197,46 @@ def resumir_metricas(df, niveles, columnas_metricas, metricas, orden=None, ascen
                  orden='Peso Desembarque_sum', ascendente=False)
 
     """
-    
-    resumen = df.groupby(niveles, dropna=False)[columnas_metricas].agg(metricas).reset_index()
-
-    # Si se pasa una sola métrica por columna, los nombres de columnas son simples.
-    # Si hay múltiples, el resultado es un MultiIndex que se puede aplanar.
-    if isinstance(resumen.columns, pd.MultiIndex):
-        resumen.columns = ['_'.join(col).strip('_') for col in resumen.columns.values]
+    if isinstance(niveles, str):
+        niveles = [niveles]
+
+    if motor == 'pandas':
+        resumen = df.groupby(niveles, dropna=False)[columnas_metricas].agg(metricas).reset_index()
+        resumen = _aplanar_columnas(resumen)
+        sumas = _sumas_numericas(resumen, niveles) if incluir_total else None
+    elif motor == 'paralelo':
+        resumen, sumas = _resumir_paralelo(df, niveles, columnas_metricas, metricas, n_procesos, n_particiones)
+    else:
+        raise ValueError(f"Motor '{motor}' no soportado. Opciones: ['pandas', 'paralelo']")
 
     if orden:
         resumen = resumen.sort_values(by=orden, ascending=ascendente)
 
     # Añadir fila de total si se solicita
     if incluir_total:
-        # Crear fila de total
-        fila_total = {}
-        
-        # Para las columnas de agrupación, solo la primera columna lleva 'TOTAL'
-        for i, nivel in enumerate(niveles):
-            if i == 0:
-                fila_total[nivel] = 'TOTAL'
-            else:
-                fila_total[nivel] = ''
-        
-        # Para las columnas numéricas, calcular la suma
-        for col in resumen.columns:
-            if col not in niveles:
-                # Verificar si la columna es numérica
-                if pd.api.types.is_numeric_dtype(resumen[col]):
-                    fila_total[col] = resumen[col].sum()
-                else:
-                    fila_total[col] = '-'
-        
-        # Crear DataFrame con la fila total y concatenar
-        df_total = pd.DataFrame([fila_total])
-        
-        # Asegurar que las columnas estén en el mismo orden
-        df_total = df_total.reindex(columns=resumen.columns)
-        
-        # Concatenar el resumen con la fila total
+        # Para las columnas de agrupación, solo la primera columna lleva 'TOTAL';
+        # las numéricas llevan su suma (ya calculada) y el resto '-'
+        fila_total = {nivel: ('TOTAL' if i == 0 else '') for i, nivel in enumerate(niveles)}
+        fila_total.update({col: sumas.get(col, '-') for col in resumen.columns if col not in niveles})
+
+        # Crear DataFrame con la fila total (mismo orden de columnas) y concatenar
+        df_total = pd.DataFrame([fila_total]).reindex(columns=resumen.columns)
         resumen = pd.concat([resumen, df_total], ignore_index=True)
 
     return resumen
 
-def detect_duplicates(df):
+def detect_duplicates(df, columnas=None):
     """
     Detecta duplicados en un DataFrame y devuelve un nuevo DataFrame con los duplicados.
 
+    Las filas se comparan por su hash de 64 bits y solo las que comparten hash se verifican de
+    forma exacta. Los errores (por ejemplo, columnas con valores no hashables) se propagan.
+
     :param df: DataFrame de pandas.
+    :param columnas: Columnas que definen la clave de duplicado. Por defecto, todas.
     :return: DataFrame con los duplicados detectados.
     """
-    try:
-        return df[df.duplicated(keep=False)]
-    except Exception as e:
-        print("Error detectando duplicados:", e)
-        return None
+    return df[mascara_duplicados(df, columnas)]
 
 def unique_df(df):
     """
@@ -233,6 +254,91 @@ def unique_df(df):
         print(f"Resumen para la columna '{column}':\n{df[column].unique()}\n")
 
 
+class IndiceClave:
+    """
+    Índice hash reutilizable sobre la columna clave (única) de una tabla de dimensiones.
+
+    La tabla hash de pandas se construye una sola vez y se reutiliza en cada merge_tables que
+    reciba este índice. Si la clave está ordenada y las claves a buscar también, se resuelve
+    mediante búsqueda binaria (merge-join) sin usar la tabla hash.
+
+    El índice refleja la tabla en el momento de construirlo: si la tabla cambia, hay que reconstruirlo.
+    """
+
+    def __init__(self, tabla, clave):
+        if clave not in tabla.columns:
+            raise KeyError(f"La columna '{clave}' no se encuentra en la tabla.")
+        self.tabla = tabla
+        self.clave = clave
+        self.indice = pd.Index(tabla[clave])
+        if not self.indice.is_unique:
+            raise ValueError(f"La columna '{clave}' tiene valores duplicados; use merge_tables sin índice.")
+        self.ordenado = self.indice.is_monotonic_increasing
+        # Fuerza la construcción de la tabla hash ahora, no en la primera unión
+        self.indice.get_indexer(self.indice[:1])
+
+    def posiciones(self, claves):
+        """
+        Posición en la tabla de cada clave buscada (-1 si no existe).
+
+        :param claves: Serie o array de claves.
+        :return: Array de enteros.
+        """
+        claves = pd.Index(claves)
+        if self.ordenado and claves.is_monotonic_increasing and len(self.indice):
+            valores = self.indice.to_numpy()
+            buscadas = claves.to_numpy()
+            try:
+                pos = np.searchsorted(valores, buscadas)
+            except TypeError:
+                return self.indice.get_indexer(claves)
+            pos_validas = np.minimum(pos, len(valores) - 1)
+            return np.where(valores[pos_validas] == buscadas, pos_validas, -1)
+        return self.indice.get_indexer(claves)
+
+
+def construir_indice_clave(tabla, clave):
+    """
+    Construye un índice reutilizable sobre la columna clave de una tabla para acelerar uniones repetidas.
+
+    :param tabla: DataFrame (normalmente una tabla de dimensiones o referencia).
+    :param clave: Nombre de la columna clave (con valores únicos).
+    :return: IndiceClave para pasar a merge_tables(..., indice_table2=...).
+
+    Ejemplo de uso:
+        indice = construir_indice_clave(df_referencia, 'Ticker')
+        for fecha, df_dia in df.groupby('Date'):
+            merge_tables(df_dia, df_referencia, 'Ticker', 'Ticker', how='left', indice_table2=indice)
+    """
+    return IndiceClave(tabla, clave)
+
+
+def _merge_con_indice(table1, table2, left_index, right_index, columnas1, columnas2, how, indice):
+    """Unión inner/left resolviendo las claves con un IndiceClave y tomando solo las columnas pedidas."""
+    pos = indice.posiciones(table1[left_index])
+    if how == 'inner':
+        filas1 = np.flatnonzero(pos >= 0)
+        pos = pos[filas1]
+    else:
+        filas1 = None
+    rellenar = bool((pos < 0).any())
+
+    # Mismos nombres de columnas que pd.merge (sufijos _x/_y en columnas repetidas)
+    clave_comun = left_index == right_index
+    repetidas = (set(columnas1) & set(columnas2)) - ({left_index} if clave_comun else set())
+
+    datos = {}
+    for col in columnas1:
+        valores = table1[col].array
+        datos[f"{col}_x" if col in repetidas else col] = valores if filas1 is None else valores.take(filas1)
+    for col in columnas2:
+        if clave_comun and col == right_index:
+            continue
+        # .array conserva los tipos extensión (category, string, Int64...) igual que pd.merge
+        datos[f"{col}_y" if col in repetidas else col] = table2[col].array.take(pos, allow_fill=rellenar)
+    return pd.DataFrame(datos)
+
+
 def merge_tables(
     table1, 
     table2, 
@@ -240,7 +346,8 @@ def merge_tables(
     right_index, 
     columns_table1=None, 
     columns_table2=None, 
-    how: 'MergeHow' = 'inner'
+    how: 'MergeHow' = 'inner',
+    indice_table2=None
 ):
     """
     Realiza una unión (merge) entre dos DataFrames utilizando columnas clave diferentes y seleccionando columnas específicas.
@@ -264,6 +371,9 @@ def merge_tables(
         Columnas a conservar de la segunda tabla. Si es None, se usan todas.
     how : str, opcional
         Tipo de unión a realizar: 'left', 'right', 'outer' o 'inner'. Por defecto es 'inner'.
+    indice_table2 : IndiceClave, opcional
+        Índice construido con construir_indice_clave(table2, right_index). Permite reutilizar la
+        tabla hash entre llamadas y evita copiar las tablas antes de unir (solo 'inner' y 'left').
 
     Retorna:
     -------
@@ -290,16 +400,32 @@ def merge_tables(
         raise KeyError(f"La columna '{right_index}' no se encuentra en la segunda tabla.")
 
     if columns_table1:
-        missing_cols1 = set(columns_table1) - set(table1.columns)
-        if missing_cols1:
-            raise KeyError(f"Columnas no encontradas en table1: {missing_cols1}")
-        table1 = table1[columns_table1 + [left_index]] if left_index not in columns_table1 else table1[columns_table1]
+        missing_cols1 = table1.columns.intersection(columns_table1).symmetric_difference(columns_table1)
+        if len(missing_cols1):
+            raise KeyError(f"Columnas no encontradas en table1: {set(missing_cols1)}")
 
     if columns_table2:
-        missing_cols2 = set(columns_table2) - set(table2.columns)
-        if missing_cols2:
-            raise KeyError(f"Columnas no encontradas en table2: {missing_cols2}")
-        table2 = table2[columns_table2 + [right_index]] if right_index not in columns_table2 else table2[columns_table2]
+        missing_cols2 = table2.columns.intersection(columns_table2).symmetric_difference(columns_table2)
+        if len(missing_cols2):
+            raise KeyError(f"Columnas no encontradas en table2: {set(missing_cols2)}")
+
+    columnas1 = list(table1.columns) if not columns_table1 else (
+        columns_table1 + [left_index] if left_index not in columns_table1 else list(columns_table1))
+    columnas2 = list(table2.columns) if not columns_table2 else (
+        columns_table2 + [right_index] if right_index not in columns_table2 else list(columns_table2))
+
+    if indice_table2 is not None:
+        if indice_table2.tabla is not table2 or indice_table2.clave != right_index:
+            raise ValueError("El índice no corresponde a table2 y la columna right_index.")
+        if how not in ('inner', 'left'):
+            raise ValueError("La unión con índice solo admite how='inner' o how='left'.")
+        return _merge_con_indice(table1, table2, left_index, right_index, columnas1, columnas2, how, indice_table2)
+
+    if columns_table1:
+        table1 = table1[columnas1]
+
+    if columns_table2:
+        table2 = table2[columnas2]
 
     merged_table = pd.merge(table1, table2, left_on=left_index, right_on=right_index, how=how)
     return merged_table
@@ -316,20 +442,48 @@ def diff_in_columns(df1, col1, df2, col2, encontrar_no_en_col2=True):
     :param encontrar_no_en_col2: Si es True, encuentra los elementos en col1 que no están en col2. Si es False, encuentra los elementos en col1 que sí están en col2.
     :return: Conjunto de elementos únicos según la condición especificada.
     """
-    # Obtiene los valores únicos de la columna col1 en df1
-    lista1 = df1[col1].unique()
-    
-    # Obtiene los valores únicos de la columna col2 en df2
-    lista2 = df2[col2].unique()
-    
-    # Convierte las listas en conjuntos
-    set_lista1 = set(lista1)
-    set_lista2 = set(lista2)
-    
+    # Valores únicos de cada columna (sin pasar por objetos Python)
+    unicos1 = pd.Index(pd.unique(df1[col1]))
+    unicos2 = pd.Index(pd.unique(df2[col2]))
+
+    # Pertenencia vectorizada mediante la tabla hash del índice
+    presentes = unicos1.isin(unicos2)
+
     # Encuentra los elementos según la condición especificada
-    if encontrar_no_en_col2:
-        elementos_resultado = set_lista1 - set_lista2
-    else:
-        elementos_resultado = set_lista1.intersection(set_lista2)
-    
-    return elementos_resultado
\ No newline at end of file
+    elementos_resultado = unicos1[~presentes] if encontrar_no_en_col2 else unicos1[presentes]
+
+    return set(elementos_resultado)
+
+
+def diff_in_columns_aproximado(chunks1, col1, chunks2, col2, encontrar_no_en_col2=True,
+                               capacidad=10_000_000, tasa_error=0.01):
+    """
+    Versión aproximada de diff_in_columns para ficheros que no caben en memoria.
+
+    Recorre chunks2 construyendo un filtro de Bloom con los valores de col2 y después recorre
+    chunks1 comprobando cada valor contra el filtro. Solo se guardan en memoria el filtro y los
+    valores del resultado.
+
+    Al no haber falsos negativos, los elementos devueltos con encontrar_no_en_col2=True seguro
+    que no están en col2, aunque puede faltar alguno (aprox. tasa_error). Con
+    encontrar_no_en_col2=False puede colarse algún elemento que no esté en col2.
+
+    :param chunks1: Iterable de DataFrames con la columna col1 (por ejemplo pd.read_csv(..., chunksize=...)).
+    :param col1: Nombre de la columna en chunks1.
+    :param chunks2: Iterable de DataFrames con la columna col2.
+    :param col2: Nombre de la columna en chunks2.
+    :param encontrar_no_en_col2: Igual que en diff_in_columns.
+    :param capacidad: Número esperado de valores distintos en col2.
+    :param tasa_error: Tasa de falsos positivos objetivo del filtro.
+    :return: Conjunto de elementos únicos según la condición especificada.
+    """
+    filtro = BloomFilter(capacidad, tasa_error)
+    for chunk in chunks2:
+        filtro.actualizar(pd.unique(chunk[col2]))
+
+    elementos_resultado = set()
+    for chunk in chunks1:
+        unicos = pd.Series(pd.unique(chunk[col1]))
+        presentes = filtro.contiene(unicos)
+        elementos_resultado.update(unicos[~presentes if encontrar_no_en_col2 else presentes])
+    return elementos_resultado
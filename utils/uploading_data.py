@@ -1,32 +1,24 @@
-import yfinance as yf
-import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ingestion import ingestar
+from utils.storage import cargar_dataset
 
 # Lista de empresas seleccionadas
 tickers = ["AAPL", "MSFT", "GOOG"]
 
-# Descarga de datos (desde 2023 hasta fin de 2024)
-data = yf.download(tickers, start="2023-01-01", end="2025-01-01", group_by="ticker", progress=False)
-
-# Reorganizamos el DataFrame a formato plano
-frames = []
-for ticker in tickers:
-    df_ticker = data[ticker].copy() # type: ignore
-    df_ticker["Ticker"] = ticker
-    df_ticker.reset_index(inplace=True)
-    frames.append(df_ticker)
+# Almacén columnar particionado por ticker y año
+ruta_almacen = os.path.join(os.path.dirname(__file__), '..', 'Data', 'acciones')
 
-# Unimos todos los tickers en un solo DataFrame
-df = pd.concat(frames, ignore_index=True)
+# Índice de agregados por día/mes/año (el mismo que usa Visualizaciones.py), actualizado en cada ingesta
+ruta_agregados = os.path.join(os.path.dirname(__file__), '..', 'Data', 'agregados')
 
-# Seleccionamos solo las columnas necesarias
-df = df[["Date", "Ticker", "Open", "High", "Low", "Close", "Volume"]]
+# Descarga incremental (desde 2023 hasta fin de 2024): solo las fechas que faltan en el almacén
+resumen = ingestar(tickers, "2023-01-01", "2025-01-01", ruta_almacen, ruta_agregados=ruta_agregados)
+print(f"Filas nuevas descargadas: {resumen['filas_nuevas']}")
 
-# Aseguramos los tipos de datos
-df["Date"] = pd.to_datetime(df["Date"])            # datetime64
-df["Ticker"] = df["Ticker"].astype(str)            # string
-for col in ["Open", "High", "Low", "Close"]:
-    df[col] = df[col].astype(float)                # float64
-df["Volume"] = df["Volume"].astype("int64")        # int64
+df = cargar_dataset(ruta_almacen, tickers=tickers)
 
 # Verificamos tipos
 print(df.dtypes)
@@ -34,7 +26,4 @@ print(df.dtypes)
 # Vista previa
 print(df.head())
 
-# Guardar CSV con encabezados correctos
-df.to_csv(r"C:\Users\jubeda2\Desktop\Visualizacion_de_Datos_PEC-2\Data\acciones_limpio.csv", index=False)
-
-print("\nDataset 'acciones_limpio.csv' creado correctamente con encabezados y tipos de datos adecuados.")
+print(f"\nAlmacén '{os.path.abspath(ruta_almacen)}' actualizado correctamente con tipos de datos adecuados.")
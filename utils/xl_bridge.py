@@ -0,0 +1,216 @@
+########################################
+#### LIBRERIAS NECESARIAS           ####
+import numpy as np
+import pandas as pd
+########################################
+
+# Filas por llamada a Excel: bloques pequeños evitan llamadas COM gigantes que bloquean Excel
+TAM_BLOQUE_XL = 5_000
+
+
+class HojaXlwings:
+    """
+    Backend de transferencia sobre una hoja de xlwings.
+
+    Cada lectura o escritura es una única llamada sobre un rango rectangular y los valores viajan
+    como arrays de NumPy (convert=np.array) en lugar de listas anidadas de Python.
+    """
+
+    def __init__(self, hoja):
+        self.hoja = hoja
+
+    def leer(self, fila, columna, n_filas, n_columnas):
+        rango = self.hoja.range((fila, columna), (fila + n_filas - 1, columna + n_columnas - 1))
+        return rango.options(np.array, ndim=2, dtype=object).value
+
+    def escribir(self, fila, columna, valores):
+        self.hoja.range((fila, columna)).value = valores
+
+
+class HojaMemoria:
+    """
+    Backend en memoria con la misma interfaz que HojaXlwings (leer/escribir por bloques).
+
+    Permite probar la importación y exportación sin Excel (por ejemplo en Linux). Las celdas
+    vacías se representan con None, igual que en xlwings.
+
+    Ejemplo de uso:
+        hoja = HojaMemoria()
+        xlexport(df, hoja=hoja)
+        df2 = xlimport(hoja=hoja)
+    """
+
+    def __init__(self, valores=None):
+        self.celdas = np.empty((0, 0), dtype=object) if valores is None else np.array(valores, dtype=object, ndmin=2)
+        self.llamadas = 0
+
+    @property
+    def forma(self):
+        return self.celdas.shape
+
+    def _ampliar(self, filas, columnas):
+        if filas > self.celdas.shape[0] or columnas > self.celdas.shape[1]:
+            nuevas = np.full((max(filas, self.celdas.shape[0]), max(columnas, self.celdas.shape[1])), None, dtype=object)
+            nuevas[:self.celdas.shape[0], :self.celdas.shape[1]] = self.celdas
+            self.celdas = nuevas
+
+    def leer(self, fila, columna, n_filas, n_columnas):
+        self.llamadas += 1
+        self._ampliar(fila + n_filas - 1, columna + n_columnas - 1)
+        return self.celdas[fila - 1:fila - 1 + n_filas, columna - 1:columna - 1 + n_columnas].copy()
+
+    def escribir(self, fila, columna, valores):
+        self.llamadas += 1
+        valores = np.array(valores, dtype=object, ndmin=2)
+        self._ampliar(fila + valores.shape[0] - 1, columna + valores.shape[1] - 1)
+        self.celdas[fila - 1:fila - 1 + valores.shape[0], columna - 1:columna - 1 + valores.shape[1]] = valores
+
+
+def _seleccion_activa():
+    """Hoja, celda de origen y forma de la región actual de la selección activa de Excel."""
+    import xlwings as xw
+
+    region = xw.books.active.app.selection.current_region  # type: ignore
+    return HojaXlwings(region.sheet), (region.row, region.column), region.shape
+
+
+def _celda_activa():
+    import xlwings as xw
+
+    seleccion = xw.books.active.app.selection  # type: ignore
+    return HojaXlwings(seleccion.sheet), (seleccion.row, seleccion.column)
+
+
+def _convertir_columnas(df, tipos=None):
+    """
+    Convierte las columnas de object a su tipo: las indicadas en tipos explícitamente y el resto
+    por inferencia (infer_objects). Solo las columnas de tipos se fuerzan a número, de modo que
+    un texto como '00123' no pierde sus ceros.
+
+    Las columnas se recorren por posición, porque la cabecera de Excel puede tener nombres
+    repetidos o celdas vacías (None).
+    """
+    tipos = tipos or {}
+    for i, columna in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        if columna in tipos:
+            tipo = tipos[columna]
+            if str(tipo).startswith("datetime"):
+                convertida = pd.to_datetime(serie)
+            elif pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(tipo)):
+                convertida = pd.to_numeric(serie).astype(tipo)
+            else:
+                convertida = serie.astype(tipo)
+        elif serie.dtype == object:
+            convertida = serie.infer_objects()
+        else:
+            continue
+        df.isetitem(i, convertida)
+    return df
+
+
+def leer_rango(hoja, origen=(1, 1), forma=None, tam_bloque=TAM_BLOQUE_XL, tipos=None, progreso=None):
+    """
+    Lee una tabla con cabecera en bloques de filas y la devuelve como DataFrame tipado.
+
+    Parámetros:
+        hoja: Backend con el método leer (HojaXlwings o HojaMemoria).
+        origen (tuple, opcional): Fila y columna (base 1) de la cabecera.
+        forma (tuple, opcional): Filas (cabecera incluida) y columnas de la tabla. Por defecto, hoja.forma.
+        tam_bloque (int, opcional): Filas de datos leídas en cada llamada.
+        tipos (dict, opcional): Tipos por columna, por ejemplo {'Date': 'datetime64[ns]', 'Volume': 'int64'}.
+        progreso (callable, opcional): Función llamada tras cada bloque con (filas_leidas, filas_totales).
+
+    Retorna:
+        pd.DataFrame: Datos de la tabla.
+    """
+    fila, columna = origen
+    n_filas, n_columnas = forma if forma is not None else hoja.forma
+    if n_filas < 1 or n_columnas < 1:
+        return pd.DataFrame()
+
+    cabecera = hoja.leer(fila, columna, 1, n_columnas)[0].tolist()
+    total = n_filas - 1
+    bloques = []
+    for inicio in range(0, total, tam_bloque):
+        n = min(tam_bloque, total - inicio)
+        bloques.append(np.asarray(hoja.leer(fila + 1 + inicio, columna, n, n_columnas), dtype=object).reshape(n, n_columnas))
+        if progreso is not None:
+            progreso(inicio + n, total)
+
+    valores = np.concatenate(bloques) if bloques else np.empty((0, n_columnas), dtype=object)
+    df = pd.DataFrame(valores, columns=cabecera)
+    return _convertir_columnas(df, tipos)
+
+
+def _bloque_excel(df):
+    """Valores de un bloque del DataFrame listos para Excel: sin NaN/NaT y con fechas de Python."""
+    columnas = []
+    for nombre in df.columns:
+        serie = df[nombre]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            valores = np.array(serie.dt.to_pydatetime(), dtype=object)
+        else:
+            valores = serie.to_numpy(dtype=object)
+        valores[pd.isna(serie).to_numpy()] = None
+        columnas.append(valores)
+    return np.column_stack(columnas) if columnas else np.empty((len(df), 0), dtype=object)
+
+
+def escribir_rango(df, hoja, origen=(1, 1), tam_bloque=TAM_BLOQUE_XL, cabecera=True, progreso=None):
+    """
+    Escribe un DataFrame (sin índice) en bloques de filas a partir de la celda origen.
+
+    Parámetros:
+        df (pd.DataFrame): Datos a escribir.
+        hoja: Backend con el método escribir (HojaXlwings o HojaMemoria).
+        origen (tuple, opcional): Fila y columna (base 1) de la primera celda.
+        tam_bloque (int, opcional): Filas escritas en cada llamada.
+        cabecera (bool, opcional): Escribe los nombres de las columnas en la primera fila.
+        progreso (callable, opcional): Función llamada tras cada bloque con (filas_escritas, filas_totales).
+    """
+    fila, columna = origen
+    if cabecera:
+        hoja.escribir(fila, columna, np.array([list(df.columns)], dtype=object))
+        fila += 1
+    total = len(df)
+    for inicio in range(0, total, tam_bloque):
+        bloque = df.iloc[inicio:inicio + tam_bloque]
+        hoja.escribir(fila + inicio, columna, _bloque_excel(bloque))
+        if progreso is not None:
+            progreso(inicio + len(bloque), total)
+
+
+def xlimport(tam_bloque=TAM_BLOQUE_XL, tipos=None, progreso=None, hoja=None, origen=(1, 1), forma=None):
+    """
+    Importa los datos de la región actual de Excel como un DataFrame de pandas.
+
+    Los datos se leen en bloques de tam_bloque filas como arrays de NumPy y las columnas se
+    convierten a su tipo (numérico, fecha) al final.
+
+    :param tam_bloque: Filas leídas en cada llamada a Excel.
+    :param tipos: Diccionario opcional {columna: dtype} para forzar el tipo de algunas columnas.
+    :param progreso: Función opcional llamada con (filas_leidas, filas_totales) tras cada bloque.
+    :param hoja: Backend alternativo (por ejemplo HojaMemoria). Por defecto, la selección activa de Excel.
+    :param origen: Celda (fila, columna) de la cabecera cuando se indica hoja.
+    :param forma: Filas y columnas de la tabla cuando se indica hoja. Por defecto, toda la hoja.
+    :return: DataFrame con los datos importados desde Excel.
+    """
+    if hoja is None:
+        hoja, origen, forma = _seleccion_activa()
+    return leer_rango(hoja, origen=origen, forma=forma, tam_bloque=tam_bloque, tipos=tipos, progreso=progreso)
+
+
+def xlexport(df, tam_bloque=TAM_BLOQUE_XL, progreso=None, hoja=None, origen=(1, 1)):
+    '''
+    Esta funcion exporta la el DataFrame 'df' a la celda activa de excel, en bloques de tam_bloque filas.
+    
+    :param df: Dataframe de pandas.
+    :param tam_bloque: Filas escritas en cada llamada a Excel.
+    :param progreso: Función opcional llamada con (filas_escritas, filas_totales) tras cada bloque.
+    :param hoja: Backend alternativo (por ejemplo HojaMemoria). Por defecto, la selección activa de Excel.
+    :param origen: Celda (fila, columna) de destino cuando se indica hoja.
+    '''
+    if hoja is None:
+        hoja, origen = _celda_activa()
+    escribir_rango(df, hoja, origen=origen, tam_bloque=tam_bloque, progreso=progreso)